@@ -0,0 +1,169 @@
+"""페이지 재실행 지연 시간 벤치마크 (Streamlit AppTest, 브라우저 없이 실행)
+
+사용자가 실제로 체감하는 것은 위젯을 바꿀 때마다 일어나는 페이지 스크립트 전체 재실행이다.
+main.py 로그인 폼으로 로그인한 뒤 각 페이지에서 전형적인 위젯 조작(필터 변경, 시간 단위 전환,
+페이지 이동, 이동평균 토글 등)을 반복하며 재실행마다 걸린 시간을 기록하고,
+데이터 크기 / 페이지 / 조작별 p50·p95·p99 를 출력한다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/bench_pages.py                          # 기본 크기, 모든 페이지
+    python benchmarks/bench_pages.py --sizes 1e4 1e6 --rounds 20
+    python benchmarks/bench_pages.py --only 분석 --json rerun.json
+
+시간에는 AppTest 의 요소 트리 처리 비용이 포함되므로 같은 환경에서 측정한 값끼리 비교한다.
+데이터 크기는 config.SAMPLE_DATA_SIZE 를 바꿔 적용하며, 크기마다 Streamlit 캐시와
+utils 의 공유 캐시를 비운 상태에서 시작한다.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+# 상위 디렉토리 경로 추가 (utils.py와 config.py 임포트를 위해)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+import utils
+import config
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+PERCENTILES = [50, 95, 99]
+INITIAL_RUN = "최초 실행"
+
+def page_path(pattern):
+    return glob.glob(os.path.join(ROOT, pattern))[0]
+
+def widget(at, kind, label):
+    """라벨로 위젯 찾기 (at.radio, at.multiselect 등 종류별 목록에서)"""
+    for element in getattr(at, kind):
+        if element.label == label:
+            return element
+    raise LookupError(f"{kind} '{label}' 위젯을 찾을 수 없습니다")
+
+def alternate(step, first, second):
+    """라운드마다 두 값을 번갈아 써서 매번 실제로 값이 바뀌게 한다"""
+    return first if step % 2 == 0 else second
+
+# 페이지별 조작 시나리오 (조작 이름, 위젯 값을 바꾸는 함수(at, 라운드 번호))
+SCENARIOS = {
+    "main.py": [],
+    "pages/1_대비보드.py": [
+        ("카테고리 필터", lambda at, step: widget(at, 'multiselect', "카테고리 선택").set_value(
+            alternate(step, config.SAMPLE_CATEGORIES[:2], config.SAMPLE_CATEGORIES))),
+        ("지역 필터", lambda at, step: widget(at, 'multiselect', "지역 선택").set_value(
+            alternate(step, config.SAMPLE_REGIONS[:3], config.SAMPLE_REGIONS))),
+        ("시간 단위", lambda at, step: widget(at, 'radio', "시간 단위").set_value(
+            utils.TIME_UNITS[(step + 1) % len(utils.TIME_UNITS)])),
+    ],
+    "pages/2_데이터_분석.py": [
+        ("카테고리 선택", lambda at, step: widget(at, 'multiselect', "분석할 카테고리 선택").set_value(
+            alternate(step, config.SAMPLE_CATEGORIES[:2], config.SAMPLE_CATEGORIES))),
+        ("지역 선택", lambda at, step: widget(at, 'multiselect', "분석할 지역 선택").set_value(
+            alternate(step, config.SAMPLE_REGIONS[:3], config.SAMPLE_REGIONS))),
+        ("시간 단위", lambda at, step: widget(at, 'radio', "시간 단위").set_value(
+            utils.TIME_UNITS[(step + 1) % len(utils.TIME_UNITS)])),
+        ("이동평균 토글", lambda at, step: widget(at, 'checkbox', "이동평균 표시").set_value(step % 2 == 0)),
+        ("탐색 필터", lambda at, step: widget(at, 'multiselect', "카테고리 필터").set_value(
+            alternate(step, config.SAMPLE_CATEGORIES[:1], []))),
+        ("정렬 변경", lambda at, step: widget(at, 'selectbox', "정렬 기준").set_value(alternate(step, "매출", "이익"))),
+        ("페이지 이동", lambda at, step: widget(at, 'number_input', "페이지 번호").set_value(step % 5 + 2)),
+    ],
+    "pages/3_설정.py": [],
+}
+
+def timed_run(at):
+    """재실행 한 번의 wall time (스크립트 예외가 있으면 중단)"""
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"페이지 실행 중 예외: {at.exception[0].value}")
+    return elapsed
+
+def login(username, password, timeout):
+    """main.py 로그인 폼으로 로그인하고 이후 페이지에 넘길 세션 상태를 반환"""
+    at = AppTest.from_file(page_path("main.py"), default_timeout=timeout)
+    at.run()
+    widget(at, 'text_input', "사용자 이름").input(username)
+    widget(at, 'text_input', "비밀번호").input(password)
+    widget(at, 'button', "로그인").click()
+    at.run()
+    if not at.session_state['authenticated']:
+        raise RuntimeError(f"'{username}' 로그인에 실패했습니다")
+    return {key: at.session_state[key] for key in ('authenticated', 'username', 'login_time')}
+
+def reset_caches(size):
+    """데이터 크기를 바꾸고 모든 캐시를 비워 첫 요청부터 다시 측정"""
+    config.SAMPLE_DATA_SIZE = size
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    utils.AGGREGATE_CACHE.clear()
+    utils.FIGURE_CACHE.clear()
+
+def bench_page(page, session, rounds, timeout):
+    """한 페이지의 최초 실행과 조작별 재실행 시간 목록"""
+    at = AppTest.from_file(page_path(page), default_timeout=timeout)
+    for key, value in session.items():
+        at.session_state[key] = value
+
+    samples = {INITIAL_RUN: [timed_run(at)]}
+    interactions = SCENARIOS[page] or [("재실행", lambda at, step: None)]
+    for step in range(rounds):
+        for name, action in interactions:
+            action(at, step)
+            samples.setdefault(name, []).append(timed_run(at))
+    return samples
+
+def summarize(samples):
+    """재실행 시간 목록의 백분위수 (밀리초)"""
+    values = np.asarray(samples) * 1000
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary['count'] = len(values)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페이지 재실행 지연 시간 벤치마크")
+    parser.add_argument('--sizes', nargs='+', type=lambda v: int(float(v)), default=DEFAULT_SIZES,
+                        help="샘플 데이터 행 수 목록 (예: 1e3 1e5 1e6)")
+    parser.add_argument('--only', default=None, help="경로에 이 문자열이 들어간 페이지만 실행")
+    parser.add_argument('--rounds', type=int, default=10, help="조작 시나리오 반복 횟수")
+    parser.add_argument('--user', default='admin', help="로그인할 사용자 (config.USERS)")
+    parser.add_argument('--timeout', type=float, default=300, help="재실행 한 번의 제한 시간 (초)")
+    parser.add_argument('--json', default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    pages = [page for page in SCENARIOS if args.only is None or args.only in page]
+    results = {}
+    for size in args.sizes:
+        reset_caches(size)
+        session = login(args.user, config.USERS[args.user], args.timeout)
+        results[str(size)] = {}
+        for page in pages:
+            samples = bench_page(page, session, args.rounds, args.timeout)
+            results[str(size)][page] = {
+                'interactions': {name: summarize(values) for name, values in samples.items()},
+                'page': summarize([v for name, values in samples.items() if name != INITIAL_RUN for v in values])
+            }
+
+    for size, pages_result in results.items():
+        print(f"\n[{int(size):,}행]")
+        print(f"{'페이지 / 조작':<40}{'p50':>10}{'p95':>10}{'p99':>10}{'횟수':>6}")
+        for page, page_result in pages_result.items():
+            rows = [(page + " (조작 전체)", page_result['page'])]
+            rows += [("  " + name, summary) for name, summary in page_result['interactions'].items()]
+            for label, summary in rows:
+                print(f"{label:<40}{summary['p50']:>8.1f}ms{summary['p95']:>8.1f}ms{summary['p99']:>8.1f}ms{summary['count']:>6}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
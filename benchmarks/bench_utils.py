@@ -0,0 +1,259 @@
+"""utils 마이크로 벤치마크
+
+데이터 크기별로 주요 utils 경로의 실행 시간(반복 중 최솟값)과 최대 메모리(tracemalloc)를 측정하고,
+저장된 기준값과 비교해 임계값을 넘게 느려지거나 메모리가 늘어난 항목이 하나라도 있으면
+종료 코드 1 로 끝난다. 배포 전에 규모가 커질 때만 드러나는 성능 저하를 찾는 용도다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/bench_utils.py                           # 기본 크기, baseline.json 과 비교
+    python benchmarks/bench_utils.py --sizes 1e3 1e5 1e7       # 크기 지정
+    python benchmarks/bench_utils.py --only explorer           # 이름에 explorer 가 들어간 항목만
+    python benchmarks/bench_utils.py --update-baseline         # 현재 결과로 기준값 갱신
+
+기준값은 측정한 환경(CPU, 라이브러리 버전)에 따라 달라지므로 같은 배포 환경에서 갱신한다.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# 상위 디렉토리 경로 추가 (utils.py와 config.py 임포트를 위해)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import config
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# 데이터 분석 페이지와 같은 집계 지표 / 데이터 탐색 조건
+ANALYSIS_METRICS = ['매출합계', '이익합계', '이익률', '거래수', '평균매출']
+EXPLORER_MIN_SALES = 5000
+EXPLORER_ROWS_PER_PAGE = 20
+
+# 벤치마크 레지스트리 (이름 -> 준비된 데이터로 한 번 실행하는 함수)
+BENCHMARKS = {}
+
+def benchmark(name):
+    """벤치마크 함수 등록 데코레이터"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+# 크기별 입력 데이터
+class Fixture:
+    """한 데이터 크기에 대해 벤치마크들이 공유하는 입력 (측정 대상 밖에서 한 번만 준비)"""
+
+    def __init__(self, n):
+        self.n = n
+        self.dataset = utils.CompactDataset.from_frame(utils.generate_sales_data(n))
+        self.cube = utils.build_cube(self.dataset)
+        self.index = utils.FilterIndex(self.dataset)
+        self.explorer_filter = utils.make_filter(
+            categories=config.SAMPLE_CATEGORIES[:2], regions=config.SAMPLE_REGIONS[:3]
+        )
+        # 필터를 통과한 행의 마지막 페이지 번호
+        self.last_page = max((len(explorer_rows(self)) - 1) // EXPLORER_ROWS_PER_PAGE + 1, 1)
+        # 정렬 순열이 이미 캐시된 상태 (같은 조건에서 페이지만 넘기는 경우)
+        self.warm_pager = utils.Pager(self.dataset)
+        explorer_page(self, self.warm_pager, 1)
+
+def explorer_rows(fx):
+    """데이터 탐색 탭의 필터 → 최소 매출 조건을 통과한 행 번호"""
+    rows = fx.index.select(fx.explorer_filter)
+    return rows[fx.dataset.sales[rows] >= EXPLORER_MIN_SALES]
+
+def explorer_page(fx, pager, page_number):
+    """데이터 탐색 탭의 필터 → 최소 매출 → 정렬 → 페이지 경로"""
+    rows = explorer_rows(fx)
+    filter_key = (fx.explorer_filter, EXPLORER_MIN_SALES)
+    page_rows = pager.page(rows, filter_key, '매출', False, page_number, EXPLORER_ROWS_PER_PAGE)
+    return fx.dataset.take(page_rows).to_frame()
+
+@benchmark('generate_sample_data')
+def bench_generate_sample_data(fx):
+    # st.cache_data 를 거치지 않은 생성 비용
+    return utils.generate_sample_data.__wrapped__(fx.n)
+
+@benchmark('build_cube')
+def bench_build_cube(fx):
+    return utils.build_cube(fx.dataset)
+
+@benchmark('get_map_data')
+def bench_get_map_data(fx):
+    return utils.get_map_data(fx.cube)
+
+def _register_time_unit(time_unit):
+    @benchmark(f'aggregate_by_time[{time_unit}]')
+    def bench_aggregate_by_time(fx):
+        return utils.aggregate_by_time(fx.cube, time_unit)
+
+for _time_unit in utils.TIME_UNITS:
+    _register_time_unit(_time_unit)
+
+@benchmark('rolling_stats[일별]')
+def bench_rolling_stats(fx):
+    # 모든 이동평균 기간의 단순/지수 이동평균과 이동 표준편차
+    return utils.rolling_stats(utils.aggregate_by_time(fx.cube, '일별'))
+
+@benchmark('category_groupby')
+def bench_category_groupby(fx):
+    filters = utils.make_filter(categories=config.SAMPLE_CATEGORIES)
+    return utils.aggregate_metrics(utils.filter_cube(fx.cube, filters), '카테고리', ANALYSIS_METRICS)
+
+@benchmark('region_groupby')
+def bench_region_groupby(fx):
+    filters = utils.make_filter(regions=config.SAMPLE_REGIONS)
+    return utils.aggregate_metrics(utils.filter_cube(fx.cube, filters), '지역', ANALYSIS_METRICS)
+
+@benchmark('explorer_first_page')
+def bench_explorer_first_page(fx):
+    # 정렬 캐시 없이 첫 페이지 (부분 정렬 경로)
+    return explorer_page(fx, utils.Pager(fx.dataset), 1)
+
+@benchmark('explorer_last_page')
+def bench_explorer_last_page(fx):
+    # 정렬 캐시 없이 마지막 페이지 (전체 정렬 경로)
+    page = explorer_page(fx, utils.Pager(fx.dataset), fx.last_page)
+    assert len(page) > 0, "마지막 페이지가 비어 있습니다"
+    return page
+
+@benchmark('explorer_next_page')
+def bench_explorer_next_page(fx):
+    # 정렬 순열이 캐시된 상태에서 페이지 이동
+    return explorer_page(fx, fx.warm_pager, 2)
+
+# 측정 함수
+def measure(func, fx, repeat):
+    """실행 시간(반복 중 최솟값)과 한 번 실행할 때의 최대 추가 메모리"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func(fx)
+        times.append(time.perf_counter() - started)
+
+    # tracemalloc 은 실행을 느리게 하므로 시간 측정과 따로 한 번 더 실행
+    gc.collect()
+    tracemalloc.start()
+    func(fx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+def run(sizes, names, repeat):
+    """크기별로 입력을 준비하고 선택한 벤치마크를 측정"""
+    results = {}
+    for n in sizes:
+        fx = Fixture(n)
+        results[str(n)] = {}
+        for name in names:
+            result = measure(BENCHMARKS[name], fx, repeat)
+            results[str(n)][name] = result
+            print(f"{name:<28}{n:>12,}{result['seconds'] * 1000:>12.2f} ms{result['peak_bytes'] / 1024 / 1024:>10.1f} MB")
+        del fx
+    return results
+
+def compare(results, baseline, time_threshold, memory_threshold, min_seconds, min_bytes):
+    """기준값 대비 임계 비율과 최소 차이를 모두 넘은 항목 목록
+
+    아주 짧은 측정은 잡음이 크므로 차이가 min_seconds / min_bytes 이하면 무시한다.
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            for metric, threshold, floor in (
+                ('seconds', time_threshold, min_seconds),
+                ('peak_bytes', memory_threshold, min_bytes)
+            ):
+                if result[metric] > base[metric] * (1 + threshold) and result[metric] - base[metric] > floor:
+                    regressions.append({
+                        'size': size,
+                        'name': name,
+                        'metric': metric,
+                        'baseline': base[metric],
+                        'current': result[metric],
+                        'ratio': result[metric] / base[metric] if base[metric] else float('inf')
+                    })
+    return regressions
+
+def environment():
+    """기준값과 함께 저장하는 측정 환경"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="utils 마이크로 벤치마크")
+    parser.add_argument('--sizes', nargs='+', type=lambda v: int(float(v)), default=DEFAULT_SIZES,
+                        help="데이터 행 수 목록 (예: 1e3 1e5 1e7)")
+    parser.add_argument('--only', default=None, help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument('--repeat', type=int, default=5, help="시간 측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument('--update-baseline', action='store_true', help="현재 결과를 기준값에 병합해 저장")
+    parser.add_argument('--time-threshold', type=float, default=0.5, help="허용하는 시간 증가 비율 (0.5 = 50%%)")
+    parser.add_argument('--memory-threshold', type=float, default=0.2, help="허용하는 메모리 증가 비율")
+    parser.add_argument('--min-seconds', type=float, default=0.002, help="이보다 작은 시간 차이는 무시")
+    parser.add_argument('--min-bytes', type=int, default=1024 * 1024, help="이보다 작은 메모리 차이는 무시")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.only is None or args.only in name]
+    print(f"{'벤치마크':<24}{'행 수':>10}{'시간':>15}{'최대 메모리':>10}")
+    results = run(args.sizes, names, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        merged = baseline.get('results', {})
+        for size, cases in results.items():
+            merged.setdefault(size, {}).update(cases)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': merged}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n기준값을 저장했습니다: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("\n기준값이 없어 비교하지 않았습니다. --update-baseline 으로 먼저 저장하세요.")
+        return 0
+
+    if baseline.get('environment') != environment():
+        print(f"\n주의: 기준값 측정 환경이 다릅니다 {baseline.get('environment')}")
+
+    regressions = compare(
+        results, baseline.get('results', {}),
+        args.time_threshold, args.memory_threshold, args.min_seconds, args.min_bytes
+    )
+    if not regressions:
+        print("\n기준값 대비 성능 저하 없음")
+        return 0
+
+    print(f"\n기준값 대비 성능 저하 {len(regressions)}건:")
+    for item in regressions:
+        unit, scale = ('ms', 1000) if item['metric'] == 'seconds' else ('MB', 1 / 1024 / 1024)
+        print(
+            f"  {item['name']} ({int(item['size']):,}행) {item['metric']}: "
+            f"{item['baseline'] * scale:,.2f}{unit} → {item['current'] * scale:,.2f}{unit} ({item['ratio']:.2f}배)"
+        )
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+
 USERS = {
     "admin": "admin123",
     "user": "user123"
@@ -21,4 +23,92 @@ MAP_REGION_COORDINATES = {
     "동부": {"lat": 36.2, "lon": 129.5},
     "서부": {"lat": 35.5, "lon": 125.0},
     "중부": {"lat": 36.8, "lon": 127.5}
-}
\ No newline at end of file
+}
+
+# 샘플 데이터 설정
+SAMPLE_CATEGORIES = ['제품A', '제품B', '제품C', '제품D']
+SAMPLE_REGIONS = ['북부', '남부', '동부', '서부', '중부']
+SAMPLE_START_DATE = '2023-01-01'
+SAMPLE_MAX_DAYS = 3650  # 샘플 데이터 기본 기간 상한 (행 수 // 10 일이 이보다 길면 잘라냄)
+
+
+# 데이터 소스 설정 (경로가 비어 있으면 샘플 데이터 사용)
+DATA_SOURCE_PATH = os.environ.get("DASHBOARD_DATA_PATH", "")
+DATA_SOURCE_FORMAT = os.environ.get("DASHBOARD_DATA_FORMAT", "")  # parquet / arrow / csv, 비우면 확장자로 판단
+CSV_CHUNK_SIZE = 500_000
+SAMPLE_DATA_SIZE = 1000
+
+# 데이터 탐색 페이지네이션 설정
+SORT_CACHE_ENTRIES = 16  # (필터 상태, 정렬 컬럼)별로 캐시할 정렬 순열 수
+TOP_K_RATIO = 8  # 요청 범위 × 이 값이 전체 행 수보다 작으면 부분 정렬(top-k) 사용
+
+# 데이터 내보내기 설정
+EXPORT_CHUNK_ROWS = 100_000  # 내보내기 시 한 번에 직렬화할 행 수
+
+# 차트 설정
+CHART_POINT_BUDGET = 1000  # 시계열 trace 당 최대 점 수 (넘으면 다운샘플링)
+CHART_DOWNSAMPLE_METHOD = "lttb"  # lttb 또는 minmax
+WEBGL_THRESHOLD = 500  # trace 점 수가 이 값을 넘으면 Scattergl 사용
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 직렬화된 figure 캐시 메모리 상한
+MOVING_AVERAGE_WINDOWS = list(range(2, 11))  # 이동평균 기간 슬라이더 범위 (모든 기간을 한 번에 미리 계산)
+
+# 집계 결과 캐시 설정 (모든 세션이 공유)
+AGGREGATE_CACHE_MAX_BYTES = 128 * 1024 * 1024  # 집계 결과 캐시 메모리 상한
+
+# 데이터 자동 갱신 주기 (초, None 은 사용 안함). 집계 캐시 항목의 유효 시간으로도 쓴다
+REFRESH_INTERVALS = {
+    "사용 안함": None,
+    "5분": 5 * 60,
+    "15분": 15 * 60,
+    "30분": 30 * 60,
+    "1시간": 60 * 60,
+    "3시간": 3 * 60 * 60,
+    "6시간": 6 * 60 * 60,
+    "12시간": 12 * 60 * 60,
+    "24시간": 24 * 60 * 60
+}
+DEFAULT_REFRESH_INTERVAL = "1시간"
+
+# 구간별 실행 시간 측정 (고급 설정에서 실행 중에도 켜고 끌 수 있음)
+PROFILING_ENABLED = os.environ.get("DASHBOARD_PROFILING", "") == "1"
+PROFILING_WINDOW = 1000  # 구간마다 보관할 최근 측정 수
+PROFILING_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]  # 히스토그램 구간 경계 (ms)
+
+# 모니터링 지표 내보내기 (Prometheus 텍스트 형식, 비우면 사용 안함)
+METRICS_EXPORTER = os.environ.get("DASHBOARD_METRICS_EXPORTER", "")  # http / file
+METRICS_HTTP_HOST = os.environ.get("DASHBOARD_METRICS_HOST", "127.0.0.1")
+METRICS_HTTP_PORT = int(os.environ.get("DASHBOARD_METRICS_PORT", "9464"))
+METRICS_FILE_PATH = os.environ.get("DASHBOARD_METRICS_FILE", "dashboard_metrics.prom")
+METRICS_FILE_INTERVAL = 15  # 지표 파일을 다시 쓰는 주기 (초)
+METRICS_LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]  # 재실행 시간 히스토그램 경계 (초)
+ACTIVE_SESSION_SECONDS = 300  # 이 시간 안에 재실행한 세션을 활성 세션으로 본다
+
+# 세션 관리 (고급 설정 > 사용자 관리에서 변경)
+MAX_CONCURRENT_SESSIONS = 10  # 동시에 로그인해 있을 수 있는 세션(브라우저 탭) 수
+SESSION_TIMEOUT_MINUTES = 60  # 이 시간 동안 재실행이 없는 세션은 만료하고 세션 상태를 비움
+
+# 이상치 감지 설정
+ANOMALY_THRESHOLD = 3.0  # 기본 임계값 (표준편차 배수, 설정 > 알림 설정에서 세션별로 변경)
+ANOMALY_METHOD = "zscore"  # zscore (이동 평균/표준편차) 또는 mad (이동 중앙값/MAD, 이상치에 덜 민감)
+ANOMALY_WINDOW = 28  # 점수 기준으로 삼을 직전 일수
+ANOMALY_MIN_PERIODS = 7  # 직전 값이 이보다 적은 날은 점수를 매기지 않음
+ANOMALY_MAD_CHUNK = 256  # mad 방식에서 한 번에 처리할 시계열 수 (메모리 상한)
+
+# 읽기 전용 집계 API (로컬 HTTP, JSON / Arrow 응답, 고급 설정 > API 설정에서도 켜고 끌 수 있음)
+API_ENABLED = os.environ.get("DASHBOARD_API", "") == "1"
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("DASHBOARD_API_PORT", "8765"))
+API_RATE_LIMIT = 100  # API 키별 분당 요청 수 (토큰 버킷, 최대 연속 요청 수도 같음)
+API_KEYS = {
+    "analytics-demo-key": "분석 API",
+    "readonly-demo-key": "읽기 전용 API"
+}
+
+# 시계열 예측 설정 (가법 Holt-Winters, 모든 카테고리×지역 일별 시계열을 한 번에 적합)
+FORECAST_SEASON_DAYS = 7  # 계절 주기 (일)
+FORECAST_ALPHA = 0.1  # 수준 평활 계수
+FORECAST_BETA = 0.01  # 추세 평활 계수
+FORECAST_GAMMA = 0.1  # 계절 평활 계수
+FORECAST_MAX_HORIZON = 180  # 미리 계산해 두는 최대 예측 일수
+FORECAST_ERROR_WINDOW = 90  # 예측 구간 폭에 쓸 최근 1일 앞 예측 오차 일수
+FORECAST_INTERVAL_Z = 1.96  # 예측 구간 배수 (1.96 = 95%)
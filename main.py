@@ -14,6 +14,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 재실행 시간 측정 시작 (모니터링 지표)
+utils.begin_page_rerun("home")
+
 # 세션 상태 초기화
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -28,15 +31,21 @@ st.markdown(utils.get_css(), unsafe_allow_html=True)
 # 로그인 함수
 def login(username, password):
     if username in config.USERS and config.USERS[username] == password:
+        # 동시 접속 세션 수 제한
+        if not utils.login_session(username):
+            st.session_state.login_rejected = True
+            return False
         st.session_state.authenticated = True
         st.session_state.username = username
         st.session_state.login_time = datetime.now()
+        st.session_state.session_expired = False
         return True
     else:
         return False
 
 # 로그아웃 함수
 def logout():
+    utils.logout_session()
     st.session_state.authenticated = False
     st.session_state.username = ""
     st.session_state.login_time = None
@@ -59,12 +68,17 @@ if not st.session_state.authenticated:
                 submit = st.form_submit_button("로그인")
                 
                 if submit:
+                    st.session_state.login_rejected = False
                     if login(username, password):
                         st.success("로그인 성공! 잠시 후 대시보드로 이동합니다.")
                         time.sleep(1)
                         st.rerun()
+                    elif st.session_state.login_rejected:
+                        st.error(f"동시 접속 사용자 수가 최대({utils.SESSIONS.max_sessions}명)에 도달했습니다. 잠시 후 다시 시도해주세요.")
                     else:
                         st.error("사용자 이름 또는 비밀번호가 올바르지 않습니다.")
+                elif st.session_state.get('session_expired', False):
+                    st.info("세션이 만료되어 로그아웃되었습니다. 다시 로그인해주세요.")
             
             # 데모 사용자 정보 표시
             st.markdown("---")
@@ -101,24 +115,28 @@ else:
     - **설정**: 화면, 알림 및 계정 설정을 관리하세요.
     """)
     
-    # 샘플 데이터 생성
-    df = utils.generate_sample_data()
+    # 집계 큐브 로드
+    with utils.profile_section("홈 · 데이터 로드"):
+        snapshot = utils.get_data_store().snapshot
+        cube = snapshot.cube
+    with utils.profile_section("홈 · 집계"):
+        totals = utils.get_metrics(snapshot, None, ['매출합계', '이익합계']).to_dict('records')[0]
     
     # KPI 표시
     st.markdown("### 주요 성과 지표")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("총 매출", f"{df['매출'].sum():,.0f}원", "+12%")
+        st.metric("총 매출", f"{totals['매출합계']:,.0f}원", "+12%")
     
     with col2:
-        st.metric("총 이익", f"{df['이익'].sum():,.0f}원", "+8%")
+        st.metric("총 이익", f"{totals['이익합계']:,.0f}원", "+8%")
     
     with col3:
-        st.metric("제품 수", f"{df['카테고리'].nunique()}개", "0")
+        st.metric("제품 수", f"{cube['카테고리'].nunique()}개", "0")
     
     with col4:
-        st.metric("지역 수", f"{df['지역'].nunique()}개", "0")
+        st.metric("지역 수", f"{cube['지역'].nunique()}개", "0")
     
     # 앱 정보
     with st.expander("앱 정보"):
@@ -129,4 +147,7 @@ else:
         로그인 기능과 다양한 페이지를 포함하고 있습니다.
         
         © 2023 Example Corp.
-        """)
\ No newline at end of file
+        """)
+
+# 재실행 시간 기록
+utils.end_page_rerun()
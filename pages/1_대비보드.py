@@ -11,6 +11,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import config
 
+# 재실행 시간 측정 시작 (모니터링 지표)
+utils.begin_page_rerun("dashboard")
+
 # 인증 확인
 utils.check_authentication()
 
@@ -48,8 +51,10 @@ else:
     date_filter = "전체 기간"
 
 # 카테고리 필터
-df = utils.generate_sample_data()
-categories = df['카테고리'].unique().tolist()
+with utils.profile_section("대시보드 · 데이터 로드"):
+    store = utils.get_data_store()
+    snapshot = store.snapshot
+categories = list(snapshot.dataset.categories)
 selected_categories = st.sidebar.multiselect(
     "카테고리 선택",
     options=categories,
@@ -57,24 +62,25 @@ selected_categories = st.sidebar.multiselect(
 )
 
 # 지역 필터
-regions = df['지역'].unique().tolist()
+regions = list(snapshot.dataset.regions)
 selected_regions = st.sidebar.multiselect(
     "지역 선택",
     options=regions,
     default=regions
 )
 
-# 필터 적용
-if selected_categories:
-    df = df[df['카테고리'].isin(selected_categories)]
-if selected_regions:
-    df = df[df['지역'].isin(selected_regions)]
-if len(date_range) == 2:
-    start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-    df = df[(df['날짜'] >= start_date) & (df['날짜'] <= end_date)]
+# 필터 조건 (집계 큐브와 상세 데이터에 같은 조건을 한 번에 적용)
+with utils.profile_section("대시보드 · 필터"):
+    sales_filter = utils.make_filter(
+        categories=selected_categories,
+        regions=selected_regions,
+        start_date=date_range[0] if len(date_range) == 2 else None,
+        end_date=date_range[1] if len(date_range) == 2 else None
+    )
+    cube = utils.filter_cube(snapshot.cube, sales_filter)
 
 # 데이터 없음 확인
-if df.empty:
+if cube.empty:
     st.warning("선택한 필터에 해당하는 데이터가 없습니다.")
     
     # 필터 리셋 버튼 추가
@@ -85,33 +91,38 @@ if df.empty:
         st.session_state['date_range'] = (start_date, today)
         st.rerun()
     
-    # 샘플 데이터를 다시 생성해 기본 화면을 표시
-    df = utils.generate_sample_data()
+    # 전체 데이터로 기본 화면을 표시
+    sales_filter = utils.make_filter()
+    cube = snapshot.cube
+
+# 집계는 모두 큐브에서 계산 (같은 필터의 결과는 세션 간에 공유)
+with utils.profile_section("대시보드 · 집계"):
+    totals = utils.get_metrics(snapshot, None, ['매출합계', '이익합계', '이익률', '거래수'], sales_filter).to_dict('records')[0]
 
 # KPI 섹션
 st.markdown("### 주요 성과 지표")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_sales = df['매출'].sum()
+    total_sales = totals['매출합계']
     prev_total_sales = total_sales * 0.88  # 가상의 이전 데이터 (12% 증가 가정)
     sales_change = ((total_sales - prev_total_sales) / prev_total_sales) * 100
     st.metric("총 매출", f"{total_sales:,.0f}원", f"{sales_change:.1f}%")
 
 with col2:
-    total_profit = df['이익'].sum()
+    total_profit = totals['이익합계']
     prev_total_profit = total_profit * 0.92  # 가상의 이전 데이터 (8% 증가 가정)
     profit_change = ((total_profit - prev_total_profit) / prev_total_profit) * 100
     st.metric("총 이익", f"{total_profit:,.0f}원", f"{profit_change:.1f}%")
 
 with col3:
-    avg_profit_margin = (df['이익'].sum() / df['매출'].sum()) * 100
+    avg_profit_margin = totals['이익률']
     prev_margin = avg_profit_margin * 0.95  # 가상의 이전 데이터 (5% 증가 가정)
     margin_change = avg_profit_margin - prev_margin
     st.metric("평균 이익률", f"{avg_profit_margin:.1f}%", f"{margin_change:.1f}%")
 
 with col4:
-    total_orders = len(df)
+    total_orders = totals['거래수']
     prev_orders = total_orders * 0.85  # 가상의 이전 데이터 (15% 증가 가정)
     orders_change = ((total_orders - prev_orders) / prev_orders) * 100
     st.metric("총 주문 건수", f"{total_orders:,}건", f"{orders_change:.1f}%")
@@ -125,33 +136,37 @@ time_unit = st.radio(
     horizontal=True
 )
 
-time_data = utils.aggregate_by_time(df, time_unit)
-
-# 매출 & 이익 추이 차트
-fig = go.Figure()
-fig.add_trace(go.Scatter(
-    x=time_data['time_group'],
-    y=time_data['매출'],
-    mode='lines+markers',
-    name='매출'
-))
-fig.add_trace(go.Scatter(
-    x=time_data['time_group'],
-    y=time_data['이익'],
-    mode='lines+markers',
-    name='이익'
-))
-
-fig.update_layout(
-    title=f'{time_unit} 매출 및 이익 추이',
-    xaxis_title='날짜',
-    yaxis_title='금액',
-    height=500,
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    margin=dict(l=20, r=20, t=40, b=20)
-)
+# 매출 & 이익 추이 차트 (점이 많으면 다운샘플링, 이상치가 있는 기간은 표시)
+anomaly_threshold = utils.get_anomaly_threshold()
 
-st.plotly_chart(fig, use_container_width=True)
+def build_trend_chart():
+    time_data = utils.get_time_series(snapshot, time_unit, sales_filter)
+    
+    fig = go.Figure()
+    fig.add_trace(utils.time_series_trace(time_data['time_group'], time_data['매출'], name='매출'))
+    fig.add_trace(utils.time_series_trace(time_data['time_group'], time_data['이익'], name='이익'))
+    
+    anomalies = utils.find_anomalies(store.anomalies(snapshot), anomaly_threshold, sales_filter)
+    marker = utils.anomaly_trace(time_data, anomalies, time_unit)
+    if marker is not None:
+        fig.add_trace(marker)
+    
+    fig.update_layout(
+        title=f'{time_unit} 매출 및 이익 추이',
+        xaxis_title='날짜',
+        yaxis_title='금액',
+        height=500,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    return fig
+
+# 차트는 (데이터 버전, 필터, 차트 파라미터) 키로 캐시
+with utils.profile_section("대시보드 · 차트"):
+    fig = utils.cached_figure(
+        ('dashboard_trend', snapshot.version, sales_filter, time_unit, anomaly_threshold), build_trend_chart
+    )
+    st.plotly_chart(fig, use_container_width=True)
 
 # 카테고리 및 지역 분석
 col1, col2 = st.columns(2)
@@ -159,78 +174,91 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### 카테고리별 분석")
     
-    # 카테고리별 매출 집계
-    category_data = df.groupby('카테고리').agg(
-        매출=('매출', 'sum'),
-        이익=('이익', 'sum'),
-        주문수=('매출', 'count')
-    ).reset_index()
-    
-    # 파이 차트
-    fig = px.pie(
-        category_data,
-        values='매출',
-        names='카테고리',
-        title='카테고리별 매출 비중',
-        color_discrete_sequence=px.colors.sequential.Blues_r
-    )
-    fig.update_traces(textposition='inside', textinfo='percent+label')
+    def build_category_pie():
+        # 카테고리별 매출 집계
+        category_data = utils.get_metrics(snapshot, '카테고리', ['매출합계', '이익합계', '거래수'], sales_filter).rename(
+            columns={'매출합계': '매출', '이익합계': '이익', '거래수': '주문수'}
+        )
+        
+        # 파이 차트
+        fig = px.pie(
+            category_data,
+            values='매출',
+            names='카테고리',
+            title='카테고리별 매출 비중',
+            color_discrete_sequence=px.colors.sequential.Blues_r
+        )
+        fig.update_traces(textposition='inside', textinfo='percent+label')
+        return fig
     
-    st.plotly_chart(fig, use_container_width=True)
+    with utils.profile_section("대시보드 · 차트"):
+        fig = utils.cached_figure(('dashboard_category_pie', snapshot.version, sales_filter), build_category_pie)
+        st.plotly_chart(fig, use_container_width=True)
 
 with col2:
     st.markdown("### 지역별 분석")
     
-    # 지역별 매출 집계
-    region_data = df.groupby('지역').agg(
-        매출=('매출', 'sum'),
-        이익=('이익', 'sum'),
-        주문수=('매출', 'count')
-    ).reset_index()
-    
-    # 막대 차트
-    fig = px.bar(
-        region_data,
-        x='지역',
-        y='매출',
-        color='이익',
-        text_auto='.2s',
-        title='지역별 매출 및 이익',
-        color_continuous_scale='Blues'
-    )
+    def build_region_bar():
+        # 지역별 매출 집계
+        region_data = utils.get_metrics(snapshot, '지역', ['매출합계', '이익합계', '거래수'], sales_filter).rename(
+            columns={'매출합계': '매출', '이익합계': '이익', '거래수': '주문수'}
+        )
+        
+        # 막대 차트
+        return px.bar(
+            region_data,
+            x='지역',
+            y='매출',
+            color='이익',
+            text_auto='.2s',
+            title='지역별 매출 및 이익',
+            color_continuous_scale='Blues'
+        )
     
-    st.plotly_chart(fig, use_container_width=True)
+    with utils.profile_section("대시보드 · 차트"):
+        fig = utils.cached_figure(('dashboard_region_bar', snapshot.version, sales_filter), build_region_bar)
+        st.plotly_chart(fig, use_container_width=True)
 
 # 지도 시각화
 st.markdown("### 지역별 매출 분포")
 
-# 지도 데이터 생성
-map_data = utils.get_map_data(df)
-
-# 지도와 크기 조정
-map_fig = px.scatter_mapbox(
-    map_data,
-    lat="lat",
-    lon="lon",
-    color="sales",
-    size="sales",
-    hover_name="region",
-    hover_data={"sales": True, "profit": True, "count": True, "lat": False, "lon": False},
-    color_continuous_scale=px.colors.sequential.Blues,
-    size_max=30,
-    zoom=6,
-    title="지역별 매출 분포"
-)
-
-map_fig.update_layout(
-    mapbox_style="open-street-map",
-    margin={"r": 0, "t": 0, "l": 0, "b": 0},
-    height=500
-)
+def build_region_map():
+    # 지도 데이터 생성
+    map_data = utils.get_map_data(cube)
+    
+    # 지도와 크기 조정
+    map_fig = px.scatter_mapbox(
+        map_data,
+        lat="lat",
+        lon="lon",
+        color="sales",
+        size="sales",
+        hover_name="region",
+        hover_data={"sales": True, "profit": True, "count": True, "lat": False, "lon": False},
+        color_continuous_scale=px.colors.sequential.Blues,
+        size_max=30,
+        zoom=6,
+        title="지역별 매출 분포"
+    )
+    
+    map_fig.update_layout(
+        mapbox_style="open-street-map",
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=500
+    )
+    return map_fig
 
-st.plotly_chart(map_fig, use_container_width=True)
+with utils.profile_section("대시보드 · 차트"):
+    map_fig = utils.cached_figure(('dashboard_region_map', snapshot.version, sales_filter), build_region_map)
+    st.plotly_chart(map_fig, use_container_width=True)
 
 # 상세 데이터 테이블
 with st.expander("상세 데이터"):
     display_cols = ['날짜', '카테고리', '지역', '매출', '이익']
-    st.dataframe(df[display_cols].sort_values('날짜', ascending=False), use_container_width=True)
\ No newline at end of file
+    with utils.profile_section("대시보드 · 테이블"):
+        rows = store.filter_index(snapshot).select(sales_filter)
+        df = snapshot.dataset.take(rows).to_frame()
+        st.dataframe(df[display_cols].sort_values('날짜', ascending=False), use_container_width=True)
+
+# 재실행 시간 기록
+utils.end_page_rerun()
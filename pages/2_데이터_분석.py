@@ -12,6 +12,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import config
 
+# 재실행 시간 측정 시작 (모니터링 지표)
+utils.begin_page_rerun("analysis")
+
 # 인증 확인
 utils.check_authentication()
 
@@ -30,7 +33,10 @@ st.markdown(utils.get_css(), unsafe_allow_html=True)
 st.markdown('<div class="main-header">📈 데이터 분석</div>', unsafe_allow_html=True)
 
 # 데이터 로드
-df = utils.generate_sample_data()
+with utils.profile_section("데이터 분석 · 데이터 로드"):
+    store = utils.get_data_store()
+    snapshot = store.snapshot
+    cube = snapshot.cube
 
 # 탭 생성
 tabs = st.tabs(["카테고리 분석", "지역 분석", "시계열 분석", "데이터 탐색"])
@@ -40,7 +46,7 @@ with tabs[0]:
     st.markdown('<div class="section-header">카테고리별 분석</div>', unsafe_allow_html=True)
     
     # 카테고리 선택
-    categories = sorted(df['카테고리'].unique())
+    categories = sorted(snapshot.dataset.categories)
     selected_categories = st.multiselect(
         "분석할 카테고리 선택",
         options=categories,
@@ -50,32 +56,32 @@ with tabs[0]:
     if not selected_categories:
         st.warning("분석할 카테고리를 하나 이상 선택하세요.")
     else:
-        filtered_df = df[df['카테고리'].isin(selected_categories)]
+        category_filter = utils.make_filter(categories=selected_categories)
         
         # 카테고리별 집계 데이터
-        category_data = filtered_df.groupby('카테고리').agg(
-            매출합계=('매출', 'sum'),
-            이익합계=('이익', 'sum'),
-            이익률=('이익', lambda x: np.sum(x) / filtered_df.loc[x.index, '매출'].sum() * 100),
-            거래수=('매출', 'count'),
-            평균매출=('매출', 'mean')
-        ).reset_index()
+        with utils.profile_section("데이터 분석 · 집계"):
+            category_data = utils.get_metrics(
+                snapshot, '카테고리', ['매출합계', '이익합계', '이익률', '거래수', '평균매출'], category_filter
+            )
         
         # 카테고리별 시각화
         col1, col2 = st.columns(2)
         
         with col1:
             # 매출 및 이익 비교
-            bar_fig = px.bar(
-                category_data,
-                x='카테고리',
-                y=['매출합계', '이익합계'],
-                barmode='group',
-                title="카테고리별 매출 및 이익",
-                color_discrete_sequence=['#1E88E5', '#5E35B1']
-            )
+            def build_category_bar():
+                return px.bar(
+                    category_data,
+                    x='카테고리',
+                    y=['매출합계', '이익합계'],
+                    barmode='group',
+                    title="카테고리별 매출 및 이익",
+                    color_discrete_sequence=['#1E88E5', '#5E35B1']
+                )
             
-            st.plotly_chart(bar_fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                bar_fig = utils.cached_figure(('analysis_category_bar', snapshot.version, category_filter), build_category_bar)
+                st.plotly_chart(bar_fig, use_container_width=True)
             
             # 데이터 테이블
             st.markdown("#### 카테고리별 상세 데이터")
@@ -91,36 +97,44 @@ with tabs[0]:
         
         with col2:
             # 파이 차트
-            pie_fig = px.pie(
-                category_data,
-                values='매출합계',
-                names='카테고리',
-                title="카테고리별 매출 비중",
-                color_discrete_sequence=px.colors.sequential.Blues_r
-            )
-            pie_fig.update_traces(textposition='inside', textinfo='percent+label')
+            def build_category_pie():
+                pie_fig = px.pie(
+                    category_data,
+                    values='매출합계',
+                    names='카테고리',
+                    title="카테고리별 매출 비중",
+                    color_discrete_sequence=px.colors.sequential.Blues_r
+                )
+                pie_fig.update_traces(textposition='inside', textinfo='percent+label')
+                return pie_fig
             
-            st.plotly_chart(pie_fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                pie_fig = utils.cached_figure(('analysis_category_pie', snapshot.version, category_filter), build_category_pie)
+                st.plotly_chart(pie_fig, use_container_width=True)
             
             # 이익률 차트
-            profit_fig = px.bar(
-                category_data,
-                x='카테고리',
-                y='이익률',
-                title="카테고리별 이익률",
-                color_discrete_sequence=['#5E35B1'],
-                text_auto='.2f'
-            )
-            profit_fig.update_layout(yaxis_title="이익률 (%)")
+            def build_category_profit():
+                profit_fig = px.bar(
+                    category_data,
+                    x='카테고리',
+                    y='이익률',
+                    title="카테고리별 이익률",
+                    color_discrete_sequence=['#5E35B1'],
+                    text_auto='.2f'
+                )
+                profit_fig.update_layout(yaxis_title="이익률 (%)")
+                return profit_fig
             
-            st.plotly_chart(profit_fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                profit_fig = utils.cached_figure(('analysis_category_profit', snapshot.version, category_filter), build_category_profit)
+                st.plotly_chart(profit_fig, use_container_width=True)
 
 # 탭 2: 지역 분석
 with tabs[1]:
     st.markdown('<div class="section-header">지역별 분석</div>', unsafe_allow_html=True)
     
     # 지역 선택
-    regions = sorted(df['지역'].unique())
+    regions = sorted(snapshot.dataset.regions)
     selected_regions = st.multiselect(
         "분석할 지역 선택",
         options=regions,
@@ -130,74 +144,82 @@ with tabs[1]:
     if not selected_regions:
         st.warning("분석할 지역을 하나 이상 선택하세요.")
     else:
-        filtered_df = df[df['지역'].isin(selected_regions)]
+        region_filter = utils.make_filter(regions=selected_regions)
         
         # 지역별 집계 데이터
-        region_data = filtered_df.groupby('지역').agg(
-            매출합계=('매출', 'sum'),
-            이익합계=('이익', 'sum'),
-            이익률=('이익', lambda x: np.sum(x) / filtered_df.loc[x.index, '매출'].sum() * 100),
-            거래수=('매출', 'count'),
-            평균매출=('매출', 'mean')
-        ).reset_index()
+        with utils.profile_section("데이터 분석 · 집계"):
+            region_data = utils.get_metrics(
+                snapshot, '지역', ['매출합계', '이익합계', '이익률', '거래수', '평균매출'], region_filter
+            )
         
         # 지역별 시각화
         col1, col2 = st.columns(2)
         
         with col1:
             # 매출 및 이익 비교
-            bar_fig = px.bar(
-                region_data,
-                x='지역',
-                y=['매출합계', '이익합계'],
-                barmode='group',
-                title="지역별 매출 및 이익",
-                color_discrete_sequence=['#1E88E5', '#5E35B1']
-            )
+            def build_region_bar():
+                return px.bar(
+                    region_data,
+                    x='지역',
+                    y=['매출합계', '이익합계'],
+                    barmode='group',
+                    title="지역별 매출 및 이익",
+                    color_discrete_sequence=['#1E88E5', '#5E35B1']
+                )
             
-            st.plotly_chart(bar_fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                bar_fig = utils.cached_figure(('analysis_region_bar', snapshot.version, region_filter), build_region_bar)
+                st.plotly_chart(bar_fig, use_container_width=True)
             
             # 이익률 차트
-            profit_fig = px.bar(
-                region_data,
-                x='지역',
-                y='이익률',
-                title="지역별 이익률",
-                color_discrete_sequence=['#5E35B1'],
-                text_auto='.2f'
-            )
-            profit_fig.update_layout(yaxis_title="이익률 (%)")
+            def build_region_profit():
+                profit_fig = px.bar(
+                    region_data,
+                    x='지역',
+                    y='이익률',
+                    title="지역별 이익률",
+                    color_discrete_sequence=['#5E35B1'],
+                    text_auto='.2f'
+                )
+                profit_fig.update_layout(yaxis_title="이익률 (%)")
+                return profit_fig
             
-            st.plotly_chart(profit_fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                profit_fig = utils.cached_figure(('analysis_region_profit', snapshot.version, region_filter), build_region_profit)
+                st.plotly_chart(profit_fig, use_container_width=True)
         
         with col2:
             # 지도 시각화
             st.markdown("#### 지역별 매출 분포")
             
-            # 지도 데이터 생성
-            map_data = utils.get_map_data(filtered_df)
-            
-            # 매출 기준 지도
-            fig = px.scatter_mapbox(
-                map_data,
-                lat="lat",
-                lon="lon",
-                color="sales",
-                size="sales",
-                hover_name="region",
-                hover_data={"sales": True, "profit": True, "count": True, "lat": False, "lon": False},
-                color_continuous_scale=px.colors.sequential.Blues,
-                size_max=30,
-                zoom=6,
-                mapbox_style="open-street-map"
-            )
-            
-            fig.update_layout(
-                height=500,
-                margin={"r": 0, "t": 0, "l": 0, "b": 0}
-            )
+            def build_region_map():
+                # 지도 데이터 생성
+                map_data = utils.get_map_data(utils.filter_cube(cube, region_filter))
+                
+                # 매출 기준 지도
+                fig = px.scatter_mapbox(
+                    map_data,
+                    lat="lat",
+                    lon="lon",
+                    color="sales",
+                    size="sales",
+                    hover_name="region",
+                    hover_data={"sales": True, "profit": True, "count": True, "lat": False, "lon": False},
+                    color_continuous_scale=px.colors.sequential.Blues,
+                    size_max=30,
+                    zoom=6,
+                    mapbox_style="open-street-map"
+                )
+                
+                fig.update_layout(
+                    height=500,
+                    margin={"r": 0, "t": 0, "l": 0, "b": 0}
+                )
+                return fig
             
-            st.plotly_chart(fig, use_container_width=True)
+            with utils.profile_section("데이터 분석 · 차트"):
+                fig = utils.cached_figure(('analysis_region_map', snapshot.version, region_filter), build_region_map)
+                st.plotly_chart(fig, use_container_width=True)
             
             # 데이터 테이블
             st.markdown("#### 지역별 상세 데이터")
@@ -235,82 +257,105 @@ with tabs[2]:
     with col3:
         show_ma = st.checkbox("이동평균 표시", value=False)
         if show_ma:
-            ma_window = st.slider("이동평균 기간", 2, 10, 3)
-    
-    # 시계열 데이터 집계
-    time_data = utils.aggregate_by_time(df, time_unit)
-    
-    # 이동평균 계산
-    if show_ma and len(time_data) > ma_window:
-        for metric in metrics:
-            time_data[f"{metric}_MA"] = time_data[metric].rolling(window=ma_window).mean()
+            ma_window = st.slider(
+                "이동평균 기간", config.MOVING_AVERAGE_WINDOWS[0], config.MOVING_AVERAGE_WINDOWS[-1], 3
+            )
+            ma_kind = st.radio("이동평균 방식", ["단순", "지수"], horizontal=True)
+        show_forecast = st.checkbox("예측 표시", value=False)
+        if show_forecast:
+            forecast_horizon = st.slider("예측 기간 (일)", 7, config.FORECAST_MAX_HORIZON, 90, 7)
     
-    # 시계열 차트
-    fig = go.Figure()
+    if not show_ma:
+        ma_window = ma_kind = None
+    if not show_forecast:
+        forecast_horizon = None
+    anomaly_threshold = utils.get_anomaly_threshold()
     
-    # 원본 데이터 추가
-    for metric in metrics:
-        fig.add_trace(go.Scatter(
-            x=time_data['time_group'],
-            y=time_data[metric],
-            mode='lines+markers',
-            name=metric
-        ))
+    def build_time_series():
+        # 시계열 데이터 집계
+        time_data = utils.get_time_series(snapshot, time_unit)
         
-        # 이동평균 추가
+        # 이동평균 (모든 기간·지표를 미리 계산해 둔 이동 통계에서 조회)
+        moving_averages = {}
         if show_ma and len(time_data) > ma_window:
-            fig.add_trace(go.Scatter(
-                x=time_data['time_group'][ma_window-1:],
-                y=time_data[f"{metric}_MA"][ma_window-1:],
-                mode='lines',
-                line=dict(dash='dash'),
-                name=f"{metric} {ma_window}기간 이동평균"
-            ))
-    
-    fig.update_layout(
-        title=f"{time_unit} 추이 분석",
-        xaxis_title="기간",
-        yaxis_title="값",
-        height=500,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        margin=dict(l=20, r=20, t=40, b=20)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # 월별/요일별 히트맵
-    st.markdown("### 패턴 분석")
-    
-    if len(df) > 0:
-        # 요일별 데이터 준비
-        df['요일'] = df['날짜'].dt.day_name()
-        df['월'] = df['날짜'].dt.month
+            rolling = utils.get_rolling_stats(snapshot, time_unit)
+            for metric in metrics:
+                moving_averages[metric] = utils.rolling_column(
+                    rolling, 'sma' if ma_kind == "단순" else 'ewma', ma_window, metric
+                )
+        
+        # 시계열 차트
+        fig = go.Figure()
+        
+        # 원본 데이터 추가 (점이 많으면 다운샘플링)
+        for metric in metrics:
+            fig.add_trace(utils.time_series_trace(time_data['time_group'], time_data[metric], name=metric))
         
-        # 요일 순서 지정
-        weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        df['요일_정렬'] = pd.Categorical(df['요일'], categories=weekday_order, ordered=True)
+            # 이동평균 추가
+            if show_ma and len(time_data) > ma_window:
+                fig.add_trace(utils.time_series_trace(
+                    time_data['time_group'][ma_window-1:],
+                    moving_averages[metric][ma_window-1:],
+                    mode='lines',
+                    line=dict(dash='dash'),
+                    name=f"{metric} {ma_window}기간 {'지수 ' if ma_kind == '지수' else ''}이동평균"
+                ))
         
-        # 월-요일별 집계
-        heatmap_data = df.groupby(['월', '요일_정렬']).agg(
-            매출=('매출', 'sum')
-        ).reset_index()
+        # 예측값과 예측 구간 (카테고리/지역별 일별 시계열을 한 번에 적합한 결과를 기간별로 합산)
+        if show_forecast:
+            for metric in metrics:
+                forecast = utils.get_forecast(store, snapshot, metric, time_unit, forecast_horizon)
+                for trace in utils.forecast_traces(forecast, metric):
+                    fig.add_trace(trace)
         
-        # 피봇 테이블 생성
-        pivot_data = heatmap_data.pivot(index='요일_정렬', columns='월', values='매출')
+        # 이상치가 있는 기간 표시 (카테고리/지역별 일별 매출 기준)
+        if '매출' in metrics:
+            anomalies = utils.find_anomalies(store.anomalies(snapshot), anomaly_threshold)
+            marker = utils.anomaly_trace(time_data, anomalies, time_unit)
+            if marker is not None:
+                fig.add_trace(marker)
         
-        # 히트맵 차트
-        heatmap_fig = px.imshow(
-            pivot_data,
-            labels=dict(x="월", y="요일", color="매출액"),
-            x=pivot_data.columns,
-            y=pivot_data.index,
-            color_continuous_scale="Blues",
-            aspect="auto",
-            title="월-요일별 매출 패턴"
+        fig.update_layout(
+            title=f"{time_unit} 추이 분석",
+            xaxis_title="기간",
+            yaxis_title="값",
+            height=500,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        return fig
+    
+    with utils.profile_section("데이터 분석 · 차트"):
+        fig = utils.cached_figure(
+            ('analysis_time_series', snapshot.version, time_unit, tuple(metrics), ma_window, ma_kind, forecast_horizon, anomaly_threshold), build_time_series
         )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # 월별/요일별 히트맵
+    st.markdown("### 패턴 분석")
+    
+    if len(cube) > 0:
+        def build_heatmap():
+            # 월-요일별 집계 (큐브에서 피봇 테이블 생성)
+            pivot_data = utils.aggregate_by_month_weekday(cube, store.cube_overlay(snapshot))
+            
+            # 히트맵 차트
+            heatmap_fig = px.imshow(
+                pivot_data,
+                labels=dict(x="월", y="요일", color="매출액"),
+                x=pivot_data.columns,
+                y=pivot_data.index,
+                color_continuous_scale="Blues",
+                aspect="auto",
+                title="월-요일별 매출 패턴"
+            )
+            
+            heatmap_fig.update_layout(height=400)
+            return heatmap_fig
         
-        heatmap_fig.update_layout(height=400)
-        st.plotly_chart(heatmap_fig, use_container_width=True)
+        with utils.profile_section("데이터 분석 · 차트"):
+            heatmap_fig = utils.cached_figure(('analysis_heatmap', snapshot.version), build_heatmap)
+            st.plotly_chart(heatmap_fig, use_container_width=True)
 
 # 탭 4: 데이터 탐색
 with tabs[3]:
@@ -324,28 +369,28 @@ with tabs[3]:
     with col1:
         search_category = st.multiselect(
             "카테고리 필터",
-            options=sorted(df['카테고리'].unique()),
+            options=sorted(snapshot.dataset.categories),
             default=[]
         )
     
     with col2:
         search_region = st.multiselect(
             "지역 필터",
-            options=sorted(df['지역'].unique()),
+            options=sorted(snapshot.dataset.regions),
             default=[]
         )
     
     with col3:
         min_sales = st.number_input("최소 매출액", value=0)
     
-    # 필터 적용
-    filtered_df = df.copy()
-    if search_category:
-        filtered_df = filtered_df[filtered_df['카테고리'].isin(search_category)]
-    if search_region:
-        filtered_df = filtered_df[filtered_df['지역'].isin(search_region)]
-    if min_sales > 0:
-        filtered_df = filtered_df[filtered_df['매출'] >= min_sales]
+    # 필터 적용 (비트맵 인덱스로 행 번호를 구한 뒤 한 번만 모음)
+    with utils.profile_section("데이터 분석 · 필터"):
+        rows = store.filter_index(snapshot).select(
+            utils.make_filter(categories=search_category, regions=search_region)
+        )
+        if min_sales > 0:
+            rows = rows[snapshot.dataset.sales[rows] >= min_sales]
+    filter_key = (tuple(search_category), tuple(search_region), min_sales)
     
     # 정렬 옵션
     sort_col = st.selectbox(
@@ -361,33 +406,45 @@ with tabs[3]:
         index=0
     )
     
-    # 정렬 적용
-    if sort_order == "내림차순":
-        filtered_df = filtered_df.sort_values(sort_col, ascending=False)
-    else:
-        filtered_df = filtered_df.sort_values(sort_col)
-    
     # 페이지네이션
     rows_per_page = st.slider("페이지당 행 수", 10, 100, 20)
     page_number = st.number_input("페이지 번호", min_value=1, value=1)
     
     # 총 페이지 수 계산
-    total_pages = (len(filtered_df) - 1) // rows_per_page + 1
-    st.write(f"총 {len(filtered_df)}개 항목 중 {rows_per_page}개씩 표시 (총 {total_pages}페이지)")
+    total_pages = (len(rows) - 1) // rows_per_page + 1
+    st.write(f"총 {len(rows)}개 항목 중 {rows_per_page}개씩 표시 (총 {total_pages}페이지)")
     
-    # 페이지네이션 적용
-    start_idx = (page_number - 1) * rows_per_page
-    end_idx = min(start_idx + rows_per_page, len(filtered_df))
-    paged_df = filtered_df.iloc[start_idx:end_idx]
+    # 정렬 및 페이지네이션 적용 (요청한 페이지의 행만 모음)
+    with utils.profile_section("데이터 분석 · 정렬/페이지"):
+        pager = store.pager(snapshot)
+        ascending = sort_order == "오름차순"
+        page_rows = pager.page(rows, filter_key, sort_col, ascending, page_number, rows_per_page)
     
     # 테이블 표시
-    st.dataframe(paged_df, use_container_width=True)
+    with utils.profile_section("데이터 분석 · 테이블"):
+        paged_df = snapshot.dataset.take(page_rows).to_frame()
+        paged_df.index = page_rows
+        st.dataframe(paged_df, use_container_width=True)
     
-    # CSV 다운로드 버튼
-    csv = filtered_df.to_csv(index=False).encode('utf-8-sig')
-    st.download_button(
-        label="CSV로 다운로드",
-        data=csv,
-        file_name=f"data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-    )
\ No newline at end of file
+    # 내보내기 (버튼을 눌렀을 때만 파일 생성, 다운로드 버튼은 파일을 만든 재실행에서만 표시)
+    export_col1, export_col2 = st.columns([1, 3])
+    with export_col1:
+        export_format = st.selectbox("내보내기 형식", options=list(utils.EXPORT_FORMATS))
+    
+    with export_col2:
+        if st.button("내보내기 파일 생성"):
+            sorted_rows = pager.sorted_rows(rows, filter_key, sort_col, ascending)
+            export_file = utils.build_export(snapshot.dataset, sorted_rows, export_format)
+            export_info = utils.EXPORT_FORMATS[export_format]
+            with export_file.open() as export_data:
+                st.download_button(
+                    label=f"{export_format}로 다운로드",
+                    data=export_data,
+                    file_name=f"data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_info['extension']}",
+                    mime=export_info['mime']
+                )
+            # 다운로드 버튼이 미디어 파일 저장소로 복사했으므로 임시 파일은 바로 삭제
+            export_file.close()
+
+# 재실행 시간 기록
+utils.end_page_rerun()
@@ -10,6 +10,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import config
 
+# 재실행 시간 측정 시작 (모니터링 지표)
+utils.begin_page_rerun("settings")
+
 # 인증 확인
 utils.check_authentication()
 
@@ -131,7 +134,8 @@ with tabs[1]:
         if "이상치 감지" in notify_events:
             anomaly_threshold = st.slider(
                 "이상치 감지 임계값 (표준편차)",
-                1.0, 5.0, 3.0, 0.1
+                1.0, 5.0, float(utils.get_anomaly_threshold()), 0.1,
+                help="대시보드와 데이터 분석의 시계열 차트에서 이 값 이상 벗어난 날을 이상치로 표시합니다"
             )
         
         if "목표 달성" in notify_events:
@@ -142,8 +146,10 @@ with tabs[1]:
     
     # 저장 버튼
     if st.button("알림 설정 저장"):
+        if "이상치 감지" in notify_events:
+            st.session_state['anomaly_threshold'] = anomaly_threshold
         st.success("알림 설정이 성공적으로 저장되었습니다! (데모용)")
-        st.info("참고: 이 데모 앱에서는 실제로 알림이 전송되지 않습니다.")
+        st.info("참고: 이 데모 앱에서는 실제로 알림이 전송되지 않습니다. 이상치 감지 임계값은 차트의 이상치 표시에 적용됩니다.")
 
 # 탭 3: 계정 설정
 with tabs[2]:
@@ -198,6 +204,7 @@ with tabs[3]:
     if not is_admin:
         st.warning("이 설정은 관리자만 접근할 수 있습니다.")
         st.info(f"현재 계정: {st.session_state.username} (관리자 권한 없음)")
+        utils.end_page_rerun()
         st.stop()
     
     # 관리자만 볼 수 있는 내용
@@ -207,17 +214,120 @@ with tabs[3]:
     st.markdown("#### 데이터 설정")
     data_refresh = st.select_slider(
         "데이터 자동 갱신 주기",
-        options=["사용 안함", "5분", "15분", "30분", "1시간", "3시간", "6시간", "12시간", "24시간"],
-        value="1시간"
+        options=list(config.REFRESH_INTERVALS),
+        value=utils.get_refresh_interval(),
+        help="공유 집계 캐시 항목의 유효 시간으로도 사용됩니다"
     )
     
+    # 백그라운드 데이터 갱신 상태
+    store = utils.get_data_store()
+    scheduler = store.scheduler
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("데이터 버전", f"{store.version:,}")
+    col2.metric("마지막 갱신", "-" if scheduler.last_run is None else scheduler.last_run.strftime("%H:%M:%S"))
+    col3.metric("갱신 소요 시간", "-" if scheduler.last_seconds is None else f"{scheduler.last_seconds * 1000:,.0f}ms")
+    col4.metric("다음 갱신", "-" if scheduler.next_run is None else scheduler.next_run.strftime("%H:%M:%S"))
+    if scheduler.last_error:
+        st.error(f"마지막 데이터 갱신에 실패했습니다: {scheduler.last_error}")
+    if store.source is None or not (store.source[0] or config.DATA_SOURCE_PATH):
+        st.caption("샘플 데이터를 사용 중이므로 자동 갱신으로 바뀌는 내용이 없습니다.")
+    if st.button("지금 데이터 갱신"):
+        scheduler.trigger()
+        st.info("백그라운드에서 데이터를 다시 읽고 있습니다. 완료되면 다음 재실행부터 새 버전이 표시됩니다.")
+
     data_retention = st.slider("데이터 보존 기간 (일)", 30, 365, 90)
     
+    # 캐시 현황 (모든 세션이 공유하는 캐시)
+    st.markdown("#### 캐시 현황")
+    
+    for cache_name, cache in [("집계 캐시", utils.AGGREGATE_CACHE), ("차트 캐시", utils.FIGURE_CACHE)]:
+        st.markdown(f"##### {cache_name}")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("항목 수", f"{len(cache):,}개")
+        col2.metric("사용 메모리", f"{cache.size_bytes / 1024 / 1024:,.1f} / {cache.max_bytes / 1024 / 1024:,.0f} MB")
+        col3.metric("히트율", f"{cache.hit_rate * 100:.1f}%")
+        col4.metric("유효 시간", "없음" if cache.ttl is None else f"{cache.ttl // 60:,}분")
+        
+        entry_stats = cache.entry_stats()
+        if entry_stats:
+            stats_df = pd.DataFrame(entry_stats)
+            stats_df = pd.DataFrame({
+                "항목": stats_df['label'],
+                "크기 (KB)": (stats_df['size'] / 1024).round(1),
+                "히트": stats_df['hits'],
+                "미스": stats_df['misses'],
+                "히트율 (%)": (stats_df['hits'] / (stats_df['hits'] + stats_df['misses']) * 100).round(1),
+                "누적 계산 시간 (ms)": (stats_df['compute_seconds'] * 1000).round(1),
+                "경과 시간 (초)": stats_df['age_seconds'].round(0),
+                "만료": stats_df['expired']
+            })
+            st.dataframe(stats_df, use_container_width=True, hide_index=True)
+        
+        if st.button(f"{cache_name} 비우기", key=f"clear_{cache_name}"):
+            cache.clear()
+            st.rerun()
+    
+    # 구간별 실행 시간 (모든 세션의 최근 측정값)
+    st.markdown("#### 성능 프로파일링")
+    
+    def set_profiling():
+        # 프로세스 전체 설정이므로 이 관리자가 토글을 바꿨을 때만 반영
+        utils.PROFILER.enabled = st.session_state['profiling_enabled']
+    
+    # 다른 세션에서 바뀐 현재 상태로 토글을 맞춤
+    st.session_state['profiling_enabled'] = utils.PROFILER.enabled
+    st.toggle(
+        "구간별 실행 시간 측정",
+        key='profiling_enabled',
+        on_change=set_profiling,
+        help="페이지의 데이터 로드·필터·집계·차트·테이블 구간 실행 시간을 모든 세션에서 수집합니다"
+    )
+    
+    profile_summary = utils.PROFILER.summary()
+    if profile_summary.empty:
+        st.info("아직 측정된 구간이 없습니다. 측정을 켠 뒤 다른 페이지를 사용하면 여기에 표시됩니다.")
+    else:
+        st.caption(f"구간마다 최근 {utils.PROFILER.window:,}회 측정값 기준")
+        st.dataframe(
+            profile_summary.round(2).sort_values('합계 (ms)', ascending=False),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        st.markdown("##### 지연 시간 분포")
+        st.dataframe(utils.PROFILER.histograms(), use_container_width=True)
+        
+        if st.button("측정값 초기화"):
+            utils.PROFILER.reset()
+            st.rerun()
+    
     # 사용자 관리
     st.markdown("#### 사용자 관리")
-    max_users = st.number_input("최대 동시 접속 사용자 수", 1, 100, 10)
+    max_users = st.number_input(
+        "최대 동시 접속 사용자 수", 1, 100, utils.SESSIONS.max_sessions,
+        help="브라우저 탭(세션) 단위로 세며, 넘으면 새 로그인을 거부합니다"
+    )
     
-    session_timeout = st.slider("세션 만료 시간 (분)", 5, 240, 60)
+    session_timeout = st.slider(
+        "세션 만료 시간 (분)", 5, 240, int(utils.SESSIONS.timeout // 60),
+        help="이 시간 동안 사용하지 않은 세션은 로그아웃되고 세션 데이터가 해제됩니다"
+    )
+    
+    # 현재 로그인 세션
+    sessions = utils.SESSIONS.sessions()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("로그인 세션", f"{len(sessions)} / {utils.SESSIONS.max_sessions}")
+    col2.metric("만료된 세션", f"{utils.SESSIONS.expired_total:,}")
+    col3.metric("거부된 로그인", f"{utils.SESSIONS.rejected_total:,}")
+    if sessions:
+        sessions_df = pd.DataFrame(sessions)
+        st.dataframe(pd.DataFrame({
+            "사용자": sessions_df['username'],
+            "로그인 시간": sessions_df['login_time'].dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "유휴 시간 (분)": (sessions_df['idle_seconds'] / 60).round(1),
+            "마지막 페이지": sessions_df['page']
+        }), use_container_width=True, hide_index=True)
     
     # 백업 설정
     st.markdown("#### 백업 설정")
@@ -238,10 +348,18 @@ with tabs[3]:
     
     # API 설정
     st.markdown("#### API 설정")
-    enable_api = st.toggle("API 활성화", value=True)
+    enable_api = st.toggle("API 활성화", value=utils.API.enabled)
+    
+    if utils.API.running:
+        st.caption(
+            f"집계 API 실행 중: http://{utils.API.host}:{utils.API.port}/api/"
+            f"{{{', '.join(utils.API_ROUTES)}}} (X-API-Key 헤더, format=json 또는 arrow)"
+        )
+    elif utils.API.error is not None:
+        st.error(f"집계 API 서버를 시작하지 못했습니다: {utils.API.error}")
     
     if enable_api:
-        rate_limit = st.number_input("API 요청 제한 (분당)", 10, 1000, 100)
+        rate_limit = st.number_input("API 요청 제한 (분당)", 10, 1000, utils.API.limiter.rate)
         api_key_expiry = st.slider("API 키 만료 기간 (일)", 1, 365, 30)
         
         st.info("API 키 관리는 여기서 합니다. (데모용)")
@@ -258,5 +376,14 @@ with tabs[3]:
     
     # 저장 버튼
     if st.button("고급 설정 저장"):
+        utils.set_refresh_interval(data_refresh)
+        utils.SESSIONS.max_sessions = max_users
+        utils.SESSIONS.timeout = session_timeout * 60
+        if enable_api:
+            utils.API.limiter.rate = rate_limit
+        utils.API.set_enabled(enable_api)
         st.success("고급 설정이 성공적으로 저장되었습니다! (데모용)")
-        st.info("참고: 이 데모 앱에서는 실제로 설정이 적용되지 않습니다.")
\ No newline at end of file
+        st.info("참고: 데이터 자동 갱신 주기, 사용자 관리, API 활성화/요청 제한 외의 설정은 이 데모 앱에서 실제로 적용되지 않습니다.")
+
+# 재실행 시간 기록
+utils.end_page_rerun()
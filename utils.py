@@ -1,7 +1,26 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
+import bisect
+import functools
+import hashlib
+import http.server
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+import warnings
+import weakref
+import zlib
+from collections import OrderedDict, deque, namedtuple
 from datetime import datetime, timedelta
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import config
 
 # CSS 스타일 정의
@@ -67,43 +86,1491 @@ def get_css():
 # 인증 확인 함수
 def check_authentication():
     if not st.session_state.get('authenticated', False):
-        st.error("로그인이 필요합니다. 메인 페이지로 이동하여 로그인해주세요.")
+        if st.session_state.get('session_expired', False):
+            st.error("세션이 만료되었습니다. 메인 페이지로 이동하여 다시 로그인해주세요.")
+        else:
+            st.error("로그인이 필요합니다. 메인 페이지로 이동하여 로그인해주세요.")
         st.stop()
     return True
 
+# 구간별 실행 시간 측정
+class _SectionTiming:
+    __slots__ = ('profiler', 'name', 'started')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+class _NoTiming:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NO_TIMING = _NoTiming()
+
+class SectionProfiler:
+    """구간 이름별 최근 실행 시간을 프로세스 전체에서 모으는 경량 프로파일러
+
+    구간마다 최근 window 개의 측정값만 보관하는 롤링 창이다. 꺼져 있으면 section() 이
+    공유 no-op 컨텍스트를 돌려주므로 비용은 속성 확인 한 번뿐이다.
+    """
+    
+    def __init__(self, window, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self._samples = {}  # 구간 이름 -> deque (초)
+        self._counts = {}  # 구간 이름 -> 누적 측정 수
+        self._lock = threading.Lock()
+    
+    def section(self, name):
+        """with 문으로 감싼 구간의 실행 시간을 기록"""
+        if not self.enabled:
+            return _NO_TIMING
+        return _SectionTiming(self, name)
+    
+    def timed(self, name):
+        """함수 전체를 한 구간으로 기록하는 데코레이터"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.section(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+    
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+    
+    def _snapshot(self):
+        with self._lock:
+            return {name: np.array(samples) * 1000 for name, samples in self._samples.items()}, dict(self._counts)
+    
+    def summary(self):
+        """구간별 최근 창의 백분위수(ms) 표"""
+        samples, counts = self._snapshot()
+        return pd.DataFrame([{
+            '구간': name,
+            '누적 측정 수': counts[name],
+            '창 내 측정 수': len(values),
+            'p50 (ms)': np.percentile(values, 50),
+            'p95 (ms)': np.percentile(values, 95),
+            'p99 (ms)': np.percentile(values, 99),
+            '최대 (ms)': values.max(),
+            '합계 (ms)': values.sum()
+        } for name, values in sorted(samples.items())], columns=[
+            '구간', '누적 측정 수', '창 내 측정 수', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', '최대 (ms)', '합계 (ms)'
+        ])
+    
+    def histograms(self, edges_ms=None):
+        """구간(행) × 지연 시간 구간(열) 측정 수 표"""
+        edges_ms = list(edges_ms or config.PROFILING_BUCKETS_MS)
+        bins = [0] + edges_ms + [np.inf]
+        labels = [f"≤{edge:,}ms" for edge in edges_ms] + [f">{edges_ms[-1]:,}ms"]
+        samples, _ = self._snapshot()
+        return pd.DataFrame(
+            [np.histogram(values, bins=bins)[0] for values in samples.values()],
+            index=list(samples), columns=labels
+        ).sort_index()
+    
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+PROFILER = SectionProfiler(config.PROFILING_WINDOW, config.PROFILING_ENABLED)
+
+def profile_section(name):
+    """PROFILER 에 실행 시간을 기록하는 컨텍스트 (꺼져 있으면 no-op)"""
+    return PROFILER.section(name)
+
 # 샘플 데이터 생성 함수
 @st.cache_data
 def generate_sample_data(n=1000):
-    np.random.seed(42)
-    dates = pd.date_range(start='2023-01-01', periods=n//10, freq='D')
-    
-    data = []
-    for _ in range(n):
-        date = np.random.choice(dates)
-        category = np.random.choice(['제품A', '제품B', '제품C', '제품D'])
-        region = np.random.choice(['북부', '남부', '동부', '서부', '중부'])
-        sales = np.random.randint(1000, 10000)
-        profit = sales * np.random.uniform(0.1, 0.3)
+    return generate_sales_data(n)
+
+# 대용량 판매 데이터 생성 함수 (컬럼 단위 벡터화)
+def generate_sales_data(n=1000, start_date=None, days=None, categories=None, regions=None, seed=42):
+    """컬럼마다 NumPy 호출 한 번으로 판매 데이터 생성
+
+    기존 행 단위 생성과 같은 분포를 따른다: 날짜·카테고리·지역은 균등 추출,
+    매출은 1000~9999 정수, 이익은 매출 × U(0.1, 0.3). days 를 생략하면 n//10 일
+    (config.SAMPLE_MAX_DAYS 일 상한, 천만 행 이상에서 날짜 범위를 넘지 않도록).
+    5천만 행도 수 초 안에 만들 수 있어 실제 규모의 부하 테스트에 사용한다.
+    """
+    if start_date is None:
+        start_date = config.SAMPLE_START_DATE
+    if days is None:
+        days = min(max(n // 10, 1), config.SAMPLE_MAX_DAYS)
+    categories = np.asarray(config.SAMPLE_CATEGORIES if categories is None else categories, dtype=object)
+    regions = np.asarray(config.SAMPLE_REGIONS if regions is None else regions, dtype=object)
+    
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start=start_date, periods=days, freq='D').values
+    sales = rng.integers(1000, 10000, size=n)
+    
+    return pd.DataFrame({
+        '날짜': dates[rng.integers(0, days, size=n)],
+        '카테고리': categories[rng.integers(0, len(categories), size=n)],
+        '지역': regions[rng.integers(0, len(regions), size=n)],
+        '매출': sales,
+        '이익': sales * rng.uniform(0.1, 0.3, size=n)
+    })
+
+# 필터 조건 (카테고리/지역/날짜 범위, None 은 조건 없음)
+SalesFilter = namedtuple('SalesFilter', ['categories', 'regions', 'start_date', 'end_date'])
+
+def make_filter(categories=None, regions=None, start_date=None, end_date=None):
+    """위젯 선택값을 캐시 키로 쓸 수 있는 정규화된 필터로 변환
+
+    빈 선택은 기존 페이지와 같이 조건 없음으로 취급하고, 날짜는 'YYYY-MM-DD' 문자열로 저장한다.
+    """
+    return SalesFilter(
+        tuple(sorted(categories)) if categories else None,
+        tuple(sorted(regions)) if regions else None,
+        pd.Timestamp(start_date).strftime('%Y-%m-%d') if start_date is not None else None,
+        pd.Timestamp(end_date).strftime('%Y-%m-%d') if end_date is not None else None
+    )
+
+def _filter_columns(filters):
+    """필터 평가에 필요한 컬럼 목록"""
+    if filters is None:
+        return []
+    columns = []
+    if filters.start_date is not None or filters.end_date is not None:
+        columns.append('날짜')
+    if filters.categories is not None:
+        columns.append('카테고리')
+    if filters.regions is not None:
+        columns.append('지역')
+    return columns
+
+def _day_number(date):
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+def _readonly(array):
+    """복사 없이 쓰기를 막은 뷰 (원본 배열은 그대로)"""
+    if not isinstance(array, np.ndarray) or not array.flags.writeable:
+        return array
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def _compact_amounts(series):
+    """매출 컬럼을 손실 없이 담을 수 있는 가장 작은 dtype 의 배열로 변환
+
+    결측값이 없고 모두 정수이며 int32 범위 안일 때만 int32 로 줄이고, 범위를 넘는 정수는
+    int64, 소수나 결측값이 있으면 float64 로 그대로 보관한다.
+    """
+    values = series.to_numpy()
+    if values.dtype.kind not in 'iuf':
+        values = pd.to_numeric(series).to_numpy()
+    if values.dtype.kind == 'f':
+        if np.isnan(values).any() or not np.array_equal(values, np.trunc(values)):
+            return values.astype(np.float64)
+    if len(values) == 0:
+        return values.astype(np.int32)
+    low, high = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+    if values.min() >= low and values.max() <= high:
+        return values.astype(np.int32)
+    return values.astype(np.int64) if values.dtype.kind != 'f' else values.astype(np.float64)
+
+def _cube_weights(values):
+    # 결측값은 pandas 합계(skipna)처럼 0 으로 더함
+    return np.nan_to_num(values) if values.dtype.kind == 'f' else values
+
+# 압축 데이터셋 (사전 인코딩 + 일 번호)
+class CompactDataset:
+    """카테고리/지역을 사전 코드로, 날짜를 일 번호로 저장하는 메모리 절약형 데이터셋
+
+    컬럼별 저장 형식:
+        날짜     int32 (1970-01-01 기준 일 번호)
+        카테고리 int8/int16 코드 + 어휘 목록
+        지역     int8/int16 코드 + 어휘 목록
+        매출     int32 (모두 int32 범위의 정수일 때, 아니면 int64 또는 float64 로 손실 없이 보관)
+        이익     float32 (상대 오차 약 1e-7)
+
+    메모리 비교 (generate_sales_data(1_000_000, days=730), memory_report 기준):
+        기존 DataFrame   40.0 MB (object 포인터만) / 213.0 MB (문자열 포함 deep)
+        CompactDataset   14.0 MB (매출이 int32 인 경우, 소수 금액이면 float64 로 행당 4바이트 추가)
+    행당 40바이트 → 14바이트로 약 2.9배, 문자열 객체까지 포함하면 약 15배 줄어든다.
+    to_frame() 은 코드 배열을 복사하지 않는 pandas Categorical 뷰를 돌려주므로
+    기존 isin 필터와 groupby 가 문자열 해시 대신 정수 코드 위에서 동작한다.
+    컬럼 프로젝션으로 읽은 경우 없는 컬럼은 None 으로 둔다.
+
+    모든 세션이 같은 객체를 복사 없이 읽으므로 컬럼 배열은 읽기 전용 뷰로 보관한다.
+    to_frame() 결과도 같은 메모리를 보므로 제자리 수정은 ValueError 가 나고, 파생 컬럼은
+    데이터셋에 붙이지 않고 ColumnOverlay 에 따로 둔다.
+    """
+    COLUMNS = ['날짜', '카테고리', '지역', '매출', '이익']
+    ARRAYS = {
+        '날짜': 'day',
+        '카테고리': 'category_codes',
+        '지역': 'region_codes',
+        '매출': 'sales',
+        '이익': 'profit'
+    }
+    
+    def __init__(self, day=None, category_codes=None, region_codes=None, sales=None, profit=None,
+                 categories=(), regions=()):
+        self.day = _readonly(day)
+        self.category_codes = _readonly(category_codes)
+        self.region_codes = _readonly(region_codes)
+        self.sales = _readonly(sales)
+        self.profit = _readonly(profit)
+        self.categories = list(categories)
+        self.regions = list(regions)
+        self._buffers = {}
+    
+    @classmethod
+    def from_frame(cls, df, categories=None, regions=None):
+        """기존 형식의 판매 DataFrame 을 압축 데이터셋으로 변환 (있는 컬럼만)"""
+        arrays = {}
+        if '카테고리' in df:
+            category = pd.Categorical(df['카테고리'], categories=sorted(df['카테고리'].dropna().unique()) if categories is None else categories)
+            arrays['category_codes'] = np.asarray(category.codes)
+            arrays['categories'] = category.categories
+        if '지역' in df:
+            region = pd.Categorical(df['지역'], categories=sorted(df['지역'].dropna().unique()) if regions is None else regions)
+            arrays['region_codes'] = np.asarray(region.codes)
+            arrays['regions'] = region.categories
+        if '날짜' in df:
+            arrays['day'] = pd.to_datetime(df['날짜']).values.astype('datetime64[D]').astype(np.int32)
+        if '매출' in df:
+            arrays['sales'] = _compact_amounts(df['매출'])
+        if '이익' in df:
+            arrays['profit'] = df['이익'].to_numpy(dtype=np.float32)
+        
+        return cls(**arrays)
+    
+    @classmethod
+    def concat(cls, datasets):
+        """여러 데이터셋을 이어붙이고 어휘가 다르면 코드를 합친 어휘 기준으로 재매핑
+
+        이어붙일 데이터셋이 없으면(데이터 행이 없는 CSV 등) 모든 컬럼이 빈 데이터셋을 반환한다.
+        """
+        datasets = list(datasets)
+        if not datasets:
+            return cls.from_frame(pd.DataFrame(columns=cls.COLUMNS))
+        first = datasets[0]
+        categories = sorted(set().union(*(ds.categories for ds in datasets)))
+        regions = sorted(set().union(*(ds.regions for ds in datasets)))
+        arrays = {'categories': categories, 'regions': regions}
+        
+        for col in first.columns:
+            attr = cls.ARRAYS[col]
+            parts = [getattr(ds, attr) for ds in datasets]
+            if col in ('카테고리', '지역'):
+                vocab = categories if col == '카테고리' else regions
+                parts = [
+                    _remap_codes(part, ds.categories if col == '카테고리' else ds.regions, vocab)
+                    for ds, part in zip(datasets, parts)
+                ]
+            arrays[attr] = np.concatenate(parts)
+        
+        return cls(**arrays)
+    
+    def append(self, other):
+        """other 의 행을 이어붙인 새 데이터셋
+
+        여유 용량이 있는 버퍼 끝에 기록하고 부족하면 두 배로 늘리므로 추가 비용은
+        분할 상환 O(추가 행 수)다. 기존 데이터셋 객체는 자기 행 범위만 보므로 그대로 유효하다.
+        other 의 어휘는 self 의 어휘를 앞부분으로 포함해야 한다(기존 코드가 바뀌지 않도록).
+        """
+        n, k = len(self), len(other)
+        arrays = {'categories': other.categories, 'regions': other.regions}
+        buffers = {}
+        for col in self.columns:
+            attr = self.ARRAYS[col]
+            current, new = getattr(self, attr), getattr(other, attr)
+            dtype = np.result_type(current, new)
+            buffer = self._buffers.get(attr)
+            if buffer is None or buffer['filled'] != n or len(buffer['data']) < n + k or buffer['data'].dtype != dtype:
+                data = np.empty(max(2 * (n + k), 1024), dtype=dtype)
+                data[:n] = current
+                buffer = {'data': data, 'filled': n}
+            buffer['data'][n:n + k] = new
+            buffer['filled'] = n + k
+            arrays[attr] = buffer['data'][:n + k]
+            buffers[attr] = buffer
         
-        data.append({
-            '날짜': date,
-            '카테고리': category,
-            '지역': region,
-            '매출': sales,
-            '이익': profit
+        result = CompactDataset(**arrays)
+        result._buffers = buffers
+        return result
+    
+    def __len__(self):
+        for attr in self.ARRAYS.values():
+            arr = getattr(self, attr)
+            if arr is not None:
+                return len(arr)
+        return 0
+    
+    @property
+    def columns(self):
+        """실제로 적재된 컬럼 목록"""
+        return [col for col in self.COLUMNS if getattr(self, self.ARRAYS[col]) is not None]
+    
+    @property
+    def dates(self):
+        """일 번호를 datetime64[ns] 배열로 변환"""
+        return self.day.astype('datetime64[D]').astype('datetime64[ns]')
+    
+    def codes_for(self, column, values):
+        """카테고리/지역 값 목록을 정수 코드 배열로 변환 (없는 값은 무시)"""
+        vocab = self.categories if column == '카테고리' else self.regions
+        lookup = {value: code for code, value in enumerate(vocab)}
+        return np.array([lookup[v] for v in values if v in lookup], dtype=np.int16)
+    
+    def column(self, name):
+        """컬럼 하나를 pandas 호환 배열로 반환 (날짜 외에는 복사 없음)"""
+        if getattr(self, self.ARRAYS.get(name, ''), None) is None:
+            raise KeyError(name)
+        if name == '날짜':
+            return self.dates
+        if name == '카테고리':
+            return pd.Categorical.from_codes(self.category_codes, categories=self.categories, validate=False)
+        if name == '지역':
+            return pd.Categorical.from_codes(self.region_codes, categories=self.regions, validate=False)
+        return getattr(self, self.ARRAYS[name])
+    
+    def select(self, columns=None):
+        """일부 컬럼만 남긴 데이터셋 (배열은 공유)"""
+        if columns is None:
+            return self
+        arrays = {'categories': self.categories, 'regions': self.regions}
+        for col in columns:
+            arrays[self.ARRAYS[col]] = getattr(self, self.ARRAYS[col])
+        return CompactDataset(**arrays)
+    
+    def take(self, index):
+        """행 인덱스(또는 불리언 마스크)로 부분 데이터셋 생성"""
+        arrays = {'categories': self.categories, 'regions': self.regions}
+        for col in self.columns:
+            arrays[self.ARRAYS[col]] = getattr(self, self.ARRAYS[col])[index]
+        return CompactDataset(**arrays)
+    
+    def filter_mask(self, filters):
+        """필터 조건 전체를 정수 코드/일 번호 비교로 한 번에 평가한 마스크"""
+        mask = np.ones(len(self), dtype=bool)
+        for col, values in (('카테고리', filters.categories), ('지역', filters.regions)):
+            if values is not None:
+                vocab = self.categories if col == '카테고리' else self.regions
+                # 마지막 칸은 결측값 코드 -1 용 (항상 False)
+                lookup = np.zeros(len(vocab) + 1, dtype=bool)
+                lookup[self.codes_for(col, values)] = True
+                mask &= lookup[getattr(self, self.ARRAYS[col])]
+        if filters.start_date is not None:
+            mask &= self.day >= _day_number(filters.start_date)
+        if filters.end_date is not None:
+            mask &= self.day <= _day_number(filters.end_date)
+        return mask
+    
+    def filter(self, filters):
+        """필터 조건에 맞는 행만 남긴 데이터셋"""
+        if filters is None or not _filter_columns(filters):
+            return self
+        return self.take(self.filter_mask(filters))
+    
+    def to_frame(self, columns=None):
+        """기존 호출부를 위한 pandas DataFrame 뷰"""
+        columns = columns or self.columns
+        return pd.DataFrame({col: self.column(col) for col in columns}, copy=False)
+    
+    def memory_usage(self):
+        """압축 저장에 사용하는 바이트 수"""
+        return sum(getattr(self, self.ARRAYS[col]).nbytes for col in self.columns)
+    
+    def memory_report(self, df):
+        """같은 데이터를 담은 기존 DataFrame 과 메모리 사용량 비교표"""
+        shallow = df.memory_usage(index=False, deep=False).sum()
+        deep = df.memory_usage(index=False, deep=True).sum()
+        compact = self.memory_usage()
+        return pd.DataFrame({
+            '형식': ['기존 DataFrame', '기존 DataFrame (deep)', 'CompactDataset'],
+            '바이트': [shallow, deep, compact],
+            '배율': [shallow / compact, deep / compact, 1.0]
+        })
+
+def _remap_codes(codes, old_vocab, new_vocab):
+    """old_vocab 기준 코드를 new_vocab 기준 코드로 변환 (결측값 코드 -1 은 그대로 유지)"""
+    if list(old_vocab) == list(new_vocab):
+        return codes
+    position = {value: code for code, value in enumerate(new_vocab)}
+    # 마지막 칸이 -1 을 받도록 어휘 길이보다 한 칸 크게 만듦
+    mapping = np.array([position[value] for value in old_vocab] + [-1], dtype=np.int16)
+    dtype = np.int8 if len(new_vocab) < 128 else np.int16
+    return mapping[codes].astype(dtype)
+
+# 데이터 소스 로더
+def _arrow_table_to_dataset(table):
+    """pyarrow Table 을 문자열 컬럼 사전 인코딩 후 CompactDataset 으로 변환"""
+    import pyarrow as pa
+    
+    for col in ('카테고리', '지역'):
+        if col in table.column_names and not pa.types.is_dictionary(table.schema.field(col).type):
+            idx = table.schema.get_field_index(col)
+            table = table.set_column(idx, col, table.column(col).dictionary_encode())
+    return CompactDataset.from_frame(table.to_pandas())
+
+def _arrow_filter_expression(filters, schema):
+    """필터 조건을 pyarrow.dataset 표현식 하나로 변환 (행 그룹 통계/파티션 가지치기에 사용)"""
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+    
+    expressions = []
+    if filters.categories is not None:
+        expressions.append(pads.field('카테고리').isin(list(filters.categories)))
+    if filters.regions is not None:
+        expressions.append(pads.field('지역').isin(list(filters.regions)))
+    for bound, date in (('start', filters.start_date), ('end', filters.end_date)):
+        if date is None:
+            continue
+        date_type = schema.field('날짜').type
+        if pa.types.is_string(date_type) or pa.types.is_large_string(date_type):
+            value = pa.scalar(date)
+        else:
+            value = pa.scalar(pd.Timestamp(date).to_pydatetime()).cast(date_type)
+        expressions.append(pads.field('날짜') >= value if bound == 'start' else pads.field('날짜') <= value)
+    
+    if not expressions:
+        return None
+    expression = expressions[0]
+    for other in expressions[1:]:
+        expression = expression & other
+    return expression
+
+def _scan_arrow_dataset(path, file_format, columns=None, filters=None):
+    """Parquet/Arrow IPC 파일 또는 hive 파티션 디렉토리를 필터와 함께 스캔"""
+    import pyarrow.dataset as pads
+    
+    dataset = pads.dataset(path, format=file_format, partitioning='hive')
+    expression = _arrow_filter_expression(filters, dataset.schema) if filters is not None else None
+    table = dataset.to_table(columns=columns, filter=expression)
+    return _arrow_table_to_dataset(table)
+
+def _read_parquet(path, columns=None, filters=None):
+    import pyarrow.dataset as pads
+    
+    file_format = pads.ParquetFileFormat(
+        read_options=pads.ParquetReadOptions(dictionary_columns=['카테고리', '지역'])
+    )
+    return _scan_arrow_dataset(path, file_format, columns, filters)
+
+def _read_arrow(path, columns=None, filters=None):
+    return _scan_arrow_dataset(path, 'ipc', columns, filters)
+
+def _read_csv(path, columns=None, filters=None):
+    read_columns = None
+    if columns is not None:
+        read_columns = columns + [col for col in _filter_columns(filters) if col not in columns]
+    parse_dates = ['날짜'] if read_columns is None or '날짜' in read_columns else False
+    chunks = pd.read_csv(
+        path,
+        usecols=read_columns,
+        parse_dates=parse_dates,
+        dtype={'카테고리': 'category', '지역': 'category'},
+        chunksize=config.CSV_CHUNK_SIZE
+    )
+    dataset = CompactDataset.concat(CompactDataset.from_frame(chunk).filter(filters) for chunk in chunks)
+    return dataset.select(columns)
+
+DATA_SOURCES = {
+    'parquet': _read_parquet,
+    'arrow': _read_arrow,
+    'feather': _read_arrow,
+    'ipc': _read_arrow,
+    'csv': _read_csv
+}
+
+def register_data_source(fmt, reader):
+    """reader(path, columns, filters) -> CompactDataset 형식의 데이터 소스 추가"""
+    DATA_SOURCES[fmt] = reader
+
+def _infer_format(path):
+    ext = os.path.splitext(path.rstrip('/'))[1].lstrip('.').lower()
+    if ext in DATA_SOURCES:
+        return ext
+    if os.path.isdir(path):
+        return 'parquet'
+    raise ValueError(f"데이터 소스 형식을 알 수 없습니다: {path}")
+
+# 데이터 로드 함수
+@PROFILER.timed("데이터 소스 읽기")
+def read_dataset(columns=None, path=None, fmt=None, filters=None):
+    """설정된 데이터 소스에서 필요한 컬럼만 읽어 CompactDataset 으로 반환
+
+    filters(SalesFilter)는 하나의 술어로 스캔 단계에 전달되어, Parquet 는 행 그룹 통계와
+    hive 파티션으로 읽을 범위를 줄인다. 경로가 설정되지 않았으면 샘플 데이터를 사용한다.
+    대시보드는 모든 세션이 공유하는 DataStore 가 소스 전체를 한 번 읽어 쓰므로 페이지에서는
+    이 함수를 직접 호출하지 않는다 (컬럼/필터 인자는 데이터 소스 리더 규약으로 남겨 둠).
+    """
+    columns = list(columns) if columns else None
+    path = path or config.DATA_SOURCE_PATH
+    if not path:
+        dataset = CompactDataset.from_frame(generate_sales_data(config.SAMPLE_DATA_SIZE))
+        return dataset.filter(filters).select(columns)
+    
+    fmt = fmt or config.DATA_SOURCE_FORMAT or _infer_format(path)
+    if fmt not in DATA_SOURCES:
+        raise ValueError(f"지원하지 않는 데이터 소스 형식입니다: {fmt}")
+    return DATA_SOURCES[fmt](path, columns, filters)
+
+# 일별 집계 큐브 생성 함수
+@PROFILER.timed("큐브 생성")
+def build_cube(dataset):
+    """(날짜, 카테고리, 지역)별 매출/이익 합계와 거래수를 담은 일별 집계 큐브
+
+    정수 코드로 셀 번호를 만들어 np.bincount 한 번씩으로 합계를 구한다.
+    큐브는 최대 일수×카테고리수×지역수 행이므로 이후 집계 비용이 거래 수와 무관하다.
+    """
+    n_categories, n_regions = len(dataset.categories), len(dataset.regions)
+    if len(dataset) == 0:
+        return pd.DataFrame({
+            '날짜': np.array([], dtype='datetime64[ns]'),
+            '카테고리': pd.Categorical([], categories=dataset.categories),
+            '지역': pd.Categorical([], categories=dataset.regions),
+            '매출': np.array([], dtype=np.int64),
+            '이익': np.array([], dtype=np.float64),
+            '거래수': np.array([], dtype=np.int64)
         })
     
-    return pd.DataFrame(data)
+    first_day = int(dataset.day.min())
+    n_cells = (int(dataset.day.max()) - first_day + 1) * n_categories * n_regions
+    cell = (dataset.day.astype(np.int64) - first_day) * n_categories + dataset.category_codes
+    cell = cell * n_regions + dataset.region_codes
+    
+    count = np.bincount(cell, minlength=n_cells)
+    sales = np.bincount(cell, weights=_cube_weights(dataset.sales), minlength=n_cells)
+    profit = np.bincount(cell, weights=_cube_weights(dataset.profit), minlength=n_cells)
+    
+    occupied = np.flatnonzero(count)
+    day_offset, rest = np.divmod(occupied, n_categories * n_regions)
+    category_codes, region_codes = np.divmod(rest, n_regions)
+    
+    return pd.DataFrame({
+        '날짜': (day_offset + first_day).astype('datetime64[D]').astype('datetime64[ns]'),
+        '카테고리': pd.Categorical.from_codes(category_codes, categories=dataset.categories),
+        '지역': pd.Categorical.from_codes(region_codes, categories=dataset.regions),
+        '매출': np.rint(sales[occupied]).astype(np.int64) if dataset.sales.dtype.kind in 'iu' else sales[occupied],
+        '이익': profit[occupied],
+        '거래수': count[occupied]
+    })
+
+# 큐브 증분 갱신 함수
+def merge_cube(cube, batch_cube):
+    """배치 큐브를 기존 큐브에 합산 (배치의 가장 이른 날짜 이후 구간만 다시 집계)
+
+    두 큐브 모두 날짜 순으로 정렬되어 있고 카테고리/지역 어휘가 같아야 한다.
+    """
+    if batch_cube.empty:
+        return cube
+    split = cube['날짜'].searchsorted(batch_cube['날짜'].min())
+    merged = pd.concat([cube.iloc[split:], batch_cube]).groupby(
+        ['날짜', '카테고리', '지역'], observed=True, sort=True
+    ).sum().reset_index()
+    return pd.concat([cube.iloc[:split], merged], ignore_index=True)
+
+# 비트맵 필터 인덱스
+class FilterIndex:
+    """카테고리 값·지역 값·월마다 행 비트맵(np.packbits)을 하나씩 둔 필터 인덱스
+
+    필터 조합은 비트맵끼리 OR(같은 차원 내)/AND(차원 사이)로 풀고 마지막에 한 번만 행을 모은다.
+    날짜 범위는 걸치는 월 비트맵으로 후보를 좁힌 뒤 후보 행에서만 일 번호를 비교한다.
+    메모리는 (카테고리 수 + 지역 수 + 월 수) × 행 수 / 8 바이트.
+    """
+    
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.size = len(dataset)
+        self.category_bitmaps = [
+            np.packbits(dataset.category_codes == code) for code in range(len(dataset.categories))
+        ]
+        self.region_bitmaps = [
+            np.packbits(dataset.region_codes == code) for code in range(len(dataset.regions))
+        ]
+        month = dataset.day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        self.months = np.unique(month)
+        self.month_bitmaps = [np.packbits(month == value) for value in self.months]
+    
+    def _union(self, bitmaps, positions):
+        bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for position in positions:
+            np.bitwise_or(bits, bitmaps[position], out=bits)
+        return bits
+    
+    def select(self, filters):
+        """필터 조건을 만족하는 행 번호 배열 (오름차순)"""
+        bits = None
+        if filters.categories is not None:
+            bits = self._union(self.category_bitmaps, self.dataset.codes_for('카테고리', filters.categories))
+        if filters.regions is not None:
+            union = self._union(self.region_bitmaps, self.dataset.codes_for('지역', filters.regions))
+            bits = union if bits is None else np.bitwise_and(bits, union, out=bits)
+        if filters.start_date is not None or filters.end_date is not None:
+            first = np.datetime64(filters.start_date or '1970-01-01', 'M').astype(np.int64)
+            last = np.datetime64(filters.end_date or '2262-04-01', 'M').astype(np.int64)
+            positions = np.flatnonzero((self.months >= first) & (self.months <= last))
+            union = self._union(self.month_bitmaps, positions)
+            bits = union if bits is None else np.bitwise_and(bits, union, out=bits)
+        
+        if bits is None:
+            return np.arange(self.size)
+        rows = np.flatnonzero(np.unpackbits(bits, count=self.size))
+        
+        # 경계 월은 일 단위로 다시 확인
+        if filters.start_date is not None:
+            rows = rows[self.dataset.day[rows] >= _day_number(filters.start_date)]
+        if filters.end_date is not None:
+            rows = rows[self.dataset.day[rows] <= _day_number(filters.end_date)]
+        return rows
+    
+    def memory_usage(self):
+        return sum(bitmap.nbytes for bitmap in self.category_bitmaps + self.region_bitmaps + self.month_bitmaps)
+
+# 정렬/페이지네이션 엔진
+class Pager:
+    """필터된 행 번호를 정렬해 한 페이지만 돌려주는 페이지네이션 엔진
+
+    (필터 상태, 정렬 컬럼)별 오름차순 안정 정렬 순열을 LRU 로 캐시하고, 내림차순은 그 순열을
+    뒤집어 쓰므로 페이지 이동이나 정렬 방향 전환에는 다시 정렬하지 않는다.
+    캐시가 없고 앞쪽 페이지만 필요하면 상위 k 개만 골라 정렬한다. 두 경로 모두 (값, 행 위치)
+    복합 키 순서(내림차순은 그 역순)를 따르므로 같은 페이지는 어느 경로로 만들어도 같다.
+    """
+    
+    def __init__(self, dataset, max_entries=None):
+        self.dataset = dataset
+        self.max_entries = max_entries or config.SORT_CACHE_ENTRIES
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def sort_key(self, column, rows):
+        """정렬 기준 값 (카테고리/지역은 어휘의 가나다순 순위)"""
+        if column in ('카테고리', '지역'):
+            vocab = self.dataset.categories if column == '카테고리' else self.dataset.regions
+            rank = np.argsort(np.argsort(np.asarray(vocab, dtype=object)))
+            return rank[getattr(self.dataset, CompactDataset.ARRAYS[column])[rows]]
+        return getattr(self.dataset, CompactDataset.ARRAYS[column])[rows]
+    
+    def _cached_order(self, key):
+        with self._lock:
+            order = self._orders.get(key)
+            if order is not None:
+                self._orders.move_to_end(key)
+            return order
+    
+    def sorted_rows(self, rows, filter_key, sort_col, ascending=True):
+        """정렬된 전체 행 번호 (순열은 캐시)"""
+        key = (filter_key, sort_col)
+        order = self._cached_order(key)
+        if order is None:
+            order = rows[np.argsort(self.sort_key(sort_col, rows), kind='stable')]
+            with self._lock:
+                self._orders[key] = order
+                while len(self._orders) > self.max_entries:
+                    self._orders.popitem(last=False)
+        return order if ascending else order[::-1]
+    
+    def page(self, rows, filter_key, sort_col, ascending, page_number, rows_per_page):
+        """page_number(1부터) 페이지에 해당하는 행 번호"""
+        start = (page_number - 1) * rows_per_page
+        end = min(start + rows_per_page, len(rows))
+        if start >= end:
+            return rows[:0]
+        
+        if self._cached_order((filter_key, sort_col)) is None and end * config.TOP_K_RATIO < len(rows):
+            top = _top_k(self.sort_key(sort_col, rows), end, largest=not ascending)
+            return rows[top[start:end]]
+        
+        return self.sorted_rows(rows, filter_key, sort_col, ascending)[start:end]
+
+def _top_k(values, k, largest=False):
+    """(값, 위치) 복합 키 오름차순으로 처음 k 개 위치 (largest 면 마지막 k 개를 역순으로)
+
+    k 번째 값을 np.partition 으로 찾고, 그 값과 같은 동점은 위치 순서대로 필요한 만큼만 채운다.
+    """
+    kth_index = len(values) - k if largest else k - 1
+    kth = np.partition(values, kth_index)[kth_index]
+    if largest:
+        strict = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[::-1][:k - len(strict)]
+    else:
+        strict = np.flatnonzero(values < kth)
+        ties = np.flatnonzero(values == kth)[:k - len(strict)]
+    top = np.concatenate([strict, ties])
+    top = top[np.lexsort((top, values[top]))]
+    return top[::-1] if largest else top
+
+# 파생 컬럼 레지스트리
+DERIVED_COLUMNS = {}
+
+def register_derived_column(name, derive):
+    """날짜 배열(datetime64[ns])로부터 계산하는 파생 컬럼 등록"""
+    DERIVED_COLUMNS[name] = derive
+
+WEEKDAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+register_derived_column('월', lambda dates: (dates.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8))
+# 1970-01-01 은 목요일이므로 (일 번호 + 3) % 7 이 월요일=0 기준 요일 코드
+register_derived_column('요일', lambda dates: pd.Categorical.from_codes(
+    (dates.astype('datetime64[D]').astype(np.int64) + 3) % 7, categories=WEEKDAY_ORDER, ordered=True
+))
+
+# 파생 컬럼 오버레이
+class ColumnOverlay:
+    """공유 데이터는 그대로 두고 파생 컬럼만 따로 계산해 두는 오버레이
+
+    각 컬럼은 처음 요청될 때 한 번 계산해 읽기 전용으로 보관하므로, 세션마다
+    데이터를 복사해 컬럼을 덧붙이는 대신 같은 오버레이를 공유한다.
+    """
+    
+    def __init__(self, dates):
+        self.dates = dates
+        self._columns = {}
+        self._lock = threading.Lock()
+    
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            values = _readonly(DERIVED_COLUMNS[name](self.dates))
+            with self._lock:
+                values = self._columns.setdefault(name, values)
+        return values
+    
+    def __len__(self):
+        return len(self.dates)
+
+# 데이터 스냅샷 (버전, 원본 데이터셋, 집계 큐브, 시간 롤업)
+DataSnapshot = namedtuple('DataSnapshot', ['version', 'dataset', 'cube', 'rollups'])
+
+# 공유 데이터 저장소
+class DataStore:
+    """프로세스 전체가 공유하는 데이터셋과 집계 큐브/시간 롤업, 그리고 증분 추가 API
+
+    상태는 DataSnapshot 하나로 묶어 참조를 한 번에 교체하므로, 읽는 쪽은 snapshot 을
+    한 번 가져와 쓰면 항상 같은 버전의 데이터셋과 큐브를 보게 된다.
+    version 은 추가/갱신할 때마다 1씩 증가하며 하위 캐시의 무효화 키로 사용한다.
+    쓰기(append, refresh)는 _write_lock 으로 서로만 직렬화하고 읽는 쪽은 잠금을 기다리지 않는다.
+    """
+    
+    def __init__(self, dataset, source=None):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._derived = {}
+        self._anomaly_detector = AnomalyDetector()
+        self._forecasters = {}  # 컬럼 -> Forecaster
+        self.source = source  # 다시 읽을 데이터 소스 (path, fmt), None 이면 갱신하지 않음
+        self._source_stamp = None
+        self.scheduler = None
+        cube = build_cube(dataset)
+        self.snapshot = DataSnapshot(0, dataset, cube, build_time_rollups(cube))
+    
+    @classmethod
+    def load(cls, path=None, fmt=None):
+        """데이터 소스 전체를 읽어 저장소 생성"""
+        # 읽기 전에 변경 표식을 남겨 두어야 읽는 도중 바뀐 내용을 다음 갱신에서 놓치지 않는다
+        stamp = source_stamp(path or config.DATA_SOURCE_PATH)
+        store = cls(read_dataset(CompactDataset.COLUMNS, path, fmt), source=(path, fmt))
+        store._source_stamp = stamp
+        return store
+    
+    @property
+    def version(self):
+        return self.snapshot.version
+    
+    @property
+    def dataset(self):
+        return self.snapshot.dataset
+    
+    @property
+    def cube(self):
+        return self.snapshot.cube
+    
+    @property
+    def rollups(self):
+        return self.snapshot.rollups
+    
+    def derived(self, snapshot, name, build):
+        """스냅샷에서 파생된 구조를 버전·이름별로 한 번만 만들어 캐시 (이전 버전 항목은 버림)"""
+        key = (snapshot.version, name)
+        value = self._derived.get(key)
+        if value is None:
+            value = build(snapshot)
+            with self._lock:
+                latest = self.snapshot.version
+                self._derived = {k: v for k, v in self._derived.items() if k[0] >= min(latest, snapshot.version)}
+                value = self._derived.setdefault(key, value)
+        return value
+    
+    def filter_index(self, snapshot):
+        """스냅샷 데이터셋의 비트맵 필터 인덱스"""
+        return self.derived(snapshot, 'filter_index', lambda snap: FilterIndex(snap.dataset))
+    
+    def pager(self, snapshot):
+        """스냅샷 데이터셋의 정렬/페이지네이션 엔진"""
+        return self.derived(snapshot, 'pager', lambda snap: Pager(snap.dataset))
+    
+    def anomalies(self, snapshot):
+        """스냅샷 큐브의 (카테고리, 지역)별 일별 매출 이상치 점수 (직전 결과에서 바뀐 날짜부터만 다시 계산)"""
+        return self.derived(snapshot, 'anomalies', lambda snap: self._anomaly_detector.update(snap.cube, snap.version))
+    
+    def forecast(self, snapshot, column='매출'):
+        """스냅샷 큐브의 (카테고리, 지역)별 일별 column 예측 (직전 적합 상태에서 바뀐 날짜부터만 다시 적합)"""
+        forecaster = self._forecasters.get(column)
+        if forecaster is None:
+            with self._lock:
+                forecaster = self._forecasters.setdefault(column, Forecaster(column))
+        return self.derived(snapshot, f'forecast:{column}', lambda snap: forecaster.update(snap.cube, snap.version))
+    
+    def cube_overlay(self, snapshot):
+        """스냅샷 큐브 행에 대한 파생 컬럼(월, 요일 등) 오버레이"""
+        return self.derived(snapshot, 'cube_overlay', lambda snap: ColumnOverlay(snap.cube['날짜'].values))
+    
+    def append(self, batch):
+        """새 거래 DataFrame 을 추가하고 영향받는 날짜 구간의 큐브만 갱신, 새 버전 번호 반환
+
+        처음 보는 카테고리/지역은 어휘 끝에 추가되어 기존 코드는 바뀌지 않는다.
+        """
+        with self._write_lock:
+            current = self.snapshot
+            dataset = current.dataset
+            categories = dataset.categories + sorted(set(batch['카테고리']) - set(dataset.categories))
+            regions = dataset.regions + sorted(set(batch['지역']) - set(dataset.regions))
+            batch_dataset = CompactDataset.from_frame(batch, categories=categories, regions=regions)
+            
+            cube = current.cube
+            if categories != dataset.categories or regions != dataset.regions:
+                cube = cube.assign(
+                    카테고리=cube['카테고리'].cat.set_categories(categories),
+                    지역=cube['지역'].cat.set_categories(regions)
+                )
+            
+            cube = merge_cube(cube, build_cube(batch_dataset))
+            self.snapshot = DataSnapshot(
+                current.version + 1,
+                dataset.append(batch_dataset),
+                cube,
+                build_time_rollups(cube)
+            )
+            return self.snapshot.version
+    
+    def warm(self, snapshot):
+        """페이지가 처음 요청할 파생 구조를 미리 만들어 둔다"""
+        self.filter_index(snapshot)
+        self.cube_overlay(snapshot)
+        self.anomalies(snapshot)
+        self.forecast(snapshot)
+    
+    def refresh(self, force=False):
+        """데이터 소스가 바뀌었으면 다시 읽어 새 스냅샷으로 교체, 새 버전 번호 반환 (바뀌지 않았으면 None)
+
+        읽기, 큐브/롤업 생성, 파생 구조 준비를 모두 마친 뒤 참조를 한 번에 교체하므로 재실행은
+        갱신을 기다리지 않고 이전 버전을 끝까지 읽는다. 소스 전체를 다시 읽으므로 append 로
+        메모리에만 추가한 행은 새 스냅샷에 남지 않는다.
+        """
+        if self.source is None:
+            return None
+        path, fmt = self.source
+        with self._write_lock:
+            stamp = source_stamp(path or config.DATA_SOURCE_PATH)
+            if not force and (stamp is None or stamp == self._source_stamp):
+                return None
+            
+            dataset = read_dataset(CompactDataset.COLUMNS, path, fmt)
+            cube = build_cube(dataset)
+            snapshot = DataSnapshot(self.snapshot.version + 1, dataset, cube, build_time_rollups(cube))
+            self.warm(snapshot)
+            self._source_stamp = stamp
+            self.snapshot = snapshot
+            return snapshot.version
+
+def source_stamp(path):
+    """데이터 소스 변경 감지용 (파일 수, 최종 수정 시각, 전체 크기), 경로가 없으면 None (샘플 데이터)"""
+    if not path:
+        return None
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names]
+    else:
+        stats = [os.stat(path)]
+    return len(stats), max((stat.st_mtime_ns for stat in stats), default=0), sum(stat.st_size for stat in stats)
+
+# 백그라운드 데이터 갱신
+class RefreshScheduler:
+    """데이터 자동 갱신 주기마다 백그라운드 스레드에서 DataStore.refresh() 실행
+
+    주기는 get_refresh_interval() 을 매번 다시 읽고, set_refresh_interval() 이나 trigger() 가
+    대기 중인 스레드를 깨운다. '사용 안함'이면 깨울 때까지 대기한다.
+    """
+    
+    def __init__(self, store):
+        self.store = store
+        self.stopped = False
+        self.runs = 0
+        self.last_run = None
+        self.last_seconds = None
+        self.last_version = None  # 마지막 실행에서 공개한 버전 (바뀐 내용이 없었으면 None)
+        self.last_error = None
+        self.next_run = None
+        self._wake = threading.Event()
+        self._force = False
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='data-refresh', daemon=True)
+                self._thread.start()
+        return self
+    
+    def wake(self):
+        """주기 변경을 바로 반영 (남은 대기를 새 주기로 다시 시작)"""
+        self._wake.set()
+    
+    def trigger(self):
+        """소스 변경 여부와 상관없이 다음 갱신을 지금 실행"""
+        self._force = True
+        self._wake.set()
+    
+    def stop(self):
+        """스레드를 끝내 저장소 참조를 놓음 (진행 중인 갱신은 마친 뒤 끝남)"""
+        self.stopped = True
+        self.next_run = None
+        self._wake.set()
+    
+    def _loop(self):
+        while not self.stopped:
+            interval = config.REFRESH_INTERVALS[get_refresh_interval()]
+            self.next_run = None if interval is None else datetime.now() + timedelta(seconds=interval)
+            woken = self._wake.wait(interval)
+            self._wake.clear()
+            if self.stopped:
+                break
+            if woken and not self._force:
+                continue
+            force, self._force = self._force, False
+            self.run_once(force)
+    
+    def run_once(self, force=False):
+        started = time.perf_counter()
+        try:
+            self.last_version = self.store.refresh(force)
+            self.last_error = None
+        except Exception as e:
+            # 갱신에 실패해도 이전 스냅샷은 그대로 제공하고 다음 주기에 다시 시도
+            logging.getLogger(__name__).exception("데이터 갱신에 실패했습니다")
+            self.last_error = f"{type(e).__name__}: {e}"
+        self.last_seconds = time.perf_counter() - started
+        self.last_run = datetime.now()
+        self.runs += 1
+
+# 공유 데이터 저장소 로드 함수
+_served_stores = {}  # (path, fmt) -> get_data_store 가 현재 제공하는 저장소
+_served_stores_lock = threading.Lock()
+
+@st.cache_resource
+def get_data_store(path=None, fmt=None):
+    """데이터 소스별 공유 저장소 (갱신 스케줄러 포함)
+
+    캐시를 비우거나 다시 로드해 같은 소스의 저장소를 새로 만들면 이전 저장소의 스케줄러를
+    멈춰, 제공하지 않는 저장소가 스레드에 붙잡혀 남거나 지표에 중복으로 잡히지 않게 한다.
+    """
+    store = DataStore.load(path, fmt)
+    store.scheduler = RefreshScheduler(store).start()
+    with _served_stores_lock:
+        previous = _served_stores.get((path, fmt))
+        _served_stores[(path, fmt)] = store
+    if previous is not None and previous.scheduler is not None:
+        previous.scheduler.stop()
+    if path is None and fmt is None:
+        API.store = store
+    return store
+
+def served_stores():
+    """get_data_store 가 현재 제공하는 저장소 목록"""
+    with _served_stores_lock:
+        return list(_served_stores.values())
+
+# 큐브 필터 함수
+def filter_cube(cube, filters):
+    """SalesFilter 조건으로 큐브 셀을 선택 (큐브 크기에 비례하는 비용)"""
+    if filters is None:
+        return cube
+    mask = np.ones(len(cube), dtype=bool)
+    if filters.categories is not None:
+        mask &= cube['카테고리'].isin(filters.categories).values
+    if filters.regions is not None:
+        mask &= cube['지역'].isin(filters.regions).values
+    if filters.start_date is not None:
+        mask &= (cube['날짜'] >= pd.Timestamp(filters.start_date)).values
+    if filters.end_date is not None:
+        mask &= (cube['날짜'] <= pd.Timestamp(filters.end_date)).values
+    return cube[mask]
+
+# 지표 레지스트리
+METRICS = {}
+
+def register_metric(name, kind, column=None, numerator=None, denominator=None, scale=1.0):
+    """집계 지표 등록
+
+    kind:
+        'sum'   column 합계
+        'count' 거래수
+        'mean'  column 합계 / 거래수
+        'ratio' numerator 합계 / denominator 합계 × scale
+                (합계끼리의 비율이므로 denominator 가중 평균 비율이 된다. 예: 이익률 = 매출 가중 평균 이익률)
+    분자·분모에는 측정 컬럼이나 '거래수'를 쓸 수 있다.
+    """
+    METRICS[name] = {
+        'kind': kind,
+        'column': column,
+        'numerator': numerator,
+        'denominator': denominator,
+        'scale': scale
+    }
+
+register_metric('매출합계', 'sum', column='매출')
+register_metric('이익합계', 'sum', column='이익')
+register_metric('거래수', 'count')
+register_metric('평균매출', 'mean', column='매출')
+register_metric('평균이익', 'mean', column='이익')
+register_metric('이익률', 'ratio', numerator='이익', denominator='매출', scale=100)
+register_metric('건당이익', 'ratio', numerator='이익', denominator='거래수')
+
+def _metric_components(spec):
+    """지표 계산에 필요한 합계 항목"""
+    if spec['kind'] == 'sum':
+        return [spec['column']]
+    if spec['kind'] == 'count':
+        return ['거래수']
+    if spec['kind'] == 'mean':
+        return [spec['column'], '거래수']
+    if spec['kind'] == 'ratio':
+        return [spec['numerator'], spec['denominator']]
+    raise ValueError(f"알 수 없는 지표 유형입니다: {spec['kind']}")
+
+# 지표 집계 함수
+def aggregate_metrics(df, by, metrics):
+    """등록된 지표들을 한 번의 그룹 합계 패스로 계산
+
+    필요한 합계 항목만 모아 groupby 를 한 번 수행하고, 평균과 비율은 그룹별 Python 콜백 없이
+    합계 컬럼끼리의 벡터 연산으로 도출한다. 큐브(거래수 컬럼 보유)와 원본 거래 데이터 모두 받는다.
+    by 가 None 이면 전체 합계 한 행을 돌려준다.
+    """
+    specs = [METRICS[name] for name in metrics]
+    components = []
+    for spec in specs:
+        for component in _metric_components(spec):
+            if component not in components:
+                components.append(component)
+    
+    is_cube = '거래수' in df
+    if by is None:
+        sums = pd.DataFrame({
+            component: [len(df) if component == '거래수' and not is_cube else df[component].sum()]
+            for component in components
+        })
+    else:
+        aggregations = {
+            component: (df.columns[0], 'size') if component == '거래수' and not is_cube else (component, 'sum')
+            for component in components
+        }
+        sums = df.groupby(by, observed=True).agg(**aggregations)
+    
+    result = pd.DataFrame(index=sums.index)
+    for name, spec in zip(metrics, specs):
+        if spec['kind'] in ('sum', 'count'):
+            result[name] = sums[_metric_components(spec)[0]]
+        elif spec['kind'] == 'mean':
+            result[name] = sums[spec['column']] / sums['거래수']
+        else:
+            result[name] = sums[spec['numerator']] / sums[spec['denominator']] * spec['scale']
+    
+    return result if by is None else result.reset_index()
+
+# 월-요일별 매출 집계 함수
+def aggregate_by_month_weekday(cube, overlay=None):
+    """월(열) × 요일(행) 매출 합계 피봇 테이블
+
+    overlay 는 cube 행에 맞춘 ColumnOverlay (DataStore.cube_overlay). 없으면 여기서 계산한다.
+    """
+    if overlay is None:
+        overlay = ColumnOverlay(cube['날짜'].values)
+    heatmap_data = pd.DataFrame({
+        '월': overlay.column('월'),
+        '요일': overlay.column('요일'),
+        '매출': cube['매출'].values
+    }, copy=False).groupby(['월', '요일'], observed=False).agg(
+        매출=('매출', 'sum')
+    ).reset_index()
+    
+    return heatmap_data.pivot(index='요일', columns='월', values='매출')
+
+# 데이터 내보내기
+EXPORT_FORMATS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv'},
+    'CSV (gzip)': {'extension': 'csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'}
+}
+
+class _ChunkSink(io.RawIOBase):
+    """pyarrow 가 쓴 바이트를 모아 두었다가 조각 단위로 꺼내는 쓰기 전용 파일 객체"""
+    
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+def _iter_csv_chunks(dataset, rows, columns, chunk_rows):
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        frame = dataset.take(rows[start:start + chunk_rows]).to_frame(columns)
+        text = frame.to_csv(index=False, header=start == 0)
+        yield text.encode('utf-8-sig' if start == 0 else 'utf-8')
+
+def _iter_parquet_chunks(dataset, rows, columns, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    sink = _ChunkSink()
+    writer = None
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        frame = dataset.take(rows[start:start + chunk_rows]).to_frame(columns)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression='zstd')
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def iter_export_chunks(dataset, rows, export_format, columns=None, chunk_rows=None):
+    """rows 순서대로 chunk_rows 행씩 직렬화한 바이트 조각을 차례로 생성
+
+    전체 CSV 문자열이나 전체 DataFrame 을 한 번에 만들지 않으므로 내보내기 중 추가 메모리는
+    조각 하나 크기에 머문다.
+    """
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    if export_format == 'Parquet':
+        yield from _iter_parquet_chunks(dataset, rows, columns, chunk_rows)
+    elif export_format == 'CSV (gzip)':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip 헤더
+        for chunk in _iter_csv_chunks(dataset, rows, columns, chunk_rows):
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+    elif export_format == 'CSV':
+        yield from _iter_csv_chunks(dataset, rows, columns, chunk_rows)
+    else:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {export_format}")
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class ExportFile:
+    """임시 파일로 만든 내보내기 결과 (close() 하거나 객체가 사라지면 파일 삭제)"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+    
+    def __len__(self):
+        return os.path.getsize(self.path)
+    
+    def open(self):
+        return open(self.path, 'rb')
+    
+    def close(self):
+        self._finalizer()
+
+def build_export(dataset, rows, export_format, columns=None):
+    """내보내기 파일을 조각 단위로 임시 파일에 써서 ExportFile 로 반환 (요청 시에만 호출)
+
+    만드는 동안 메모리에는 조각 하나만 올라간다. st.download_button 은 넘겨받은 파일을
+    한 번 전부 읽어 미디어 파일 저장소에 두므로, 버튼은 파일을 만든 재실행에서만 그리고
+    세션에 보관하지 않는다 (다음 재실행에서 버튼이 사라지면 저장소 사본도 해제된다).
+    """
+    fd, path = tempfile.mkstemp(prefix='dashboard_export_', suffix='.' + EXPORT_FORMATS[export_format]['extension'])
+    export_file = ExportFile(path)
+    with os.fdopen(fd, 'wb') as f:
+        for chunk in iter_export_chunks(dataset, rows, export_format, columns):
+            f.write(chunk)
+    return export_file
+
+# 시계열 다운샘플링
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets 로 남길 점의 인덱스 (처음과 끝 점은 항상 포함)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def minmax_indices(y, n_out):
+    """n_out/2 개 구간마다 최솟값과 최댓값 점의 인덱스 (피크를 보존)"""
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    valid = ~np.all(np.isnan(padded), axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    lows = offsets + np.nanargmin(padded[valid], axis=1)
+    highs = offsets + np.nanargmax(padded[valid], axis=1)
+    return np.unique(np.concatenate([lows, highs]))
+
+def downsample_series(x, y, budget=None, method=None):
+    """포인트 예산 이하로 줄인 (x, y) (NaN 이 있는 구간은 미리 제외)"""
+    budget = budget or config.CHART_POINT_BUDGET
+    method = method or config.CHART_DOWNSAMPLE_METHOD
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+    if len(y) <= budget:
+        return x, y
+    if method == 'minmax':
+        indices = minmax_indices(y, budget)
+    else:
+        numeric_x = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+        indices = lttb_indices(numeric_x, y, budget)
+    return x[indices], y[indices]
+
+def time_series_trace(x, y, name, mode='lines+markers', budget=None, **kwargs):
+    """다운샘플링한 시계열 trace (점이 WEBGL_THRESHOLD 를 넘으면 Scattergl 사용)"""
+    x, y = downsample_series(x, y, budget)
+    trace_type = go.Scattergl if len(y) > config.WEBGL_THRESHOLD else go.Scatter
+    return trace_type(x=x, y=y, mode=mode, name=name, **kwargs)
+
+# 바이트 상한 LRU 캐시
+class LRUCache:
+    """항목 크기 합이 max_bytes 를 넘으면 가장 오래 쓰지 않은 항목부터 버리는 스레드 안전 캐시
+
+    ttl(초)이 있으면 저장 후 ttl 이 지난 항목은 없는 것으로 본다. ttl 은 실행 중에 바꿔도
+    기존 항목에 바로 적용된다. 항목별 히트/미스 수와 누적 계산 시간을 함께 기록한다.
+    """
+    
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size, 저장 시각)
+        self._stats = {}  # key -> 항목 통계 (만료 후 다시 계산해도 유지, 제거되면 삭제)
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at >= self.ttl
+    
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2], time.monotonic()):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if key in self._stats:
+                self._stats[key]['hits'] += 1
+            return entry[0]
+    
+    def put(self, key, value, size, label=None, compute_seconds=0.0):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self._stats.pop(key, None)
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            stats = self._stats.setdefault(key, {'label': label or key, 'hits': 0, 'misses': 0, 'compute_seconds': 0.0})
+            stats['misses'] += 1
+            stats['compute_seconds'] += compute_seconds
+            while self._bytes > self.max_bytes:
+                evicted, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats.pop(evicted, None)
+    
+    def get_or_compute(self, key, compute, size_of=len, label=None):
+        """캐시에 있으면 돌려주고, 없으면 compute() 결과를 계산 시간과 함께 저장
+
+        계산은 잠금 밖에서 하므로 같은 키를 동시에 처음 요청하면 중복 계산될 수 있다(결과는 같다).
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            started = time.perf_counter()
+            value = compute()
+            self.put(key, value, size_of(value), label=label, compute_seconds=time.perf_counter() - started)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self._bytes = 0
+    
+    def entry_stats(self):
+        """현재 항목별 통계 목록 (최근 사용 순)"""
+        now = time.monotonic()
+        with self._lock:
+            rows = []
+            for key in reversed(self._entries):
+                _, size, stored_at = self._entries[key]
+                stats = self._stats[key]
+                rows.append({
+                    'label': stats['label'],
+                    'size': size,
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'compute_seconds': stats['compute_seconds'],
+                    'age_seconds': now - stored_at,
+                    'expired': self._expired(stored_at, now)
+                })
+            return rows
+    
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+def cache_key(*parts):
+    """버전·필터·파라미터를 정규화된 JSON 으로 직렬화한 해시 키"""
+    text = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# 차트 figure 캐시
+FIGURE_CACHE = LRUCache(config.FIGURE_CACHE_MAX_BYTES)
+
+def cached_figure(key_parts, build):
+    """(데이터 버전, 필터, 차트 파라미터) 키로 직렬화된 figure 스펙을 재사용
+
+    스펙은 UTF-8 바이트로 보관해 캐시 용량이 실제 바이트 수로 계산되도록 하고,
+    처음 만들 때 이미 검증되었으므로 복원할 때는 검증을 건너뛴다.
+    """
+    key = cache_key(*key_parts)
+    spec = FIGURE_CACHE.get_or_compute(key, lambda: build().to_json().encode('utf-8'), label=_cache_label(key_parts))
+    return go.Figure(json.loads(spec), _validate=False)
+
+# 집계 결과 캐시 (세션 간 공유, 유효 시간은 데이터 자동 갱신 주기)
+AGGREGATE_CACHE = LRUCache(
+    config.AGGREGATE_CACHE_MAX_BYTES, ttl=config.REFRESH_INTERVALS[config.DEFAULT_REFRESH_INTERVAL]
+)
+_refresh_interval = config.DEFAULT_REFRESH_INTERVAL
+
+def get_refresh_interval():
+    """현재 데이터 자동 갱신 주기 (config.REFRESH_INTERVALS 의 키)"""
+    return _refresh_interval
+
+def set_refresh_interval(interval):
+    """데이터 자동 갱신 주기를 바꾸고 집계 캐시 유효 시간에 반영 (모든 세션에 적용)"""
+    global _refresh_interval
+    AGGREGATE_CACHE.ttl = config.REFRESH_INTERVALS[interval]
+    _refresh_interval = interval
+    for store in served_stores():
+        if store.scheduler is not None:
+            store.scheduler.wake()
+
+def _cache_label(key_parts):
+    return ' · '.join(str(part) for part in key_parts)
+
+def _result_size(value):
+    """캐시 용량 계산용 집계 결과 크기 (바이트)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_result_size(item) for item in value)
+    return len(json.dumps(value, default=str).encode('utf-8'))
+
+def cached_aggregate(snapshot, name, params, compute):
+    """(데이터 버전, 집계 이름, 파라미터) 키로 집계 결과를 모든 세션이 공유
+
+    반환값은 여러 세션이 같이 쓰므로 수정하지 않는다 (필요하면 복사해서 사용).
+    """
+    key_parts = (name, snapshot.version, params)
+    return AGGREGATE_CACHE.get_or_compute(
+        cache_key(*key_parts), compute, size_of=_result_size, label=_cache_label(key_parts)
+    )
+
+def get_metrics(snapshot, by, metrics, filters=None):
+    """스냅샷 큐브를 필터링해 지표 집계 (공유 집계 캐시 사용)"""
+    return cached_aggregate(
+        snapshot, 'metrics', (by, tuple(metrics), filters),
+        lambda: aggregate_metrics(filter_cube(snapshot.cube, filters), by, metrics)
+    )
 
 # 지역 좌표 데이터 변환 함수
 def get_map_data(df):
     """판매 데이터에서 지도 시각화를 위한 데이터프레임 생성"""
     # 지역별 판매 집계
-    region_sales = df.groupby('지역').agg(
-        매출합계=('매출', 'sum'),
-        이익합계=('이익', 'sum'),
-        거래수=('매출', 'count')
-    ).reset_index()
+    region_sales = aggregate_metrics(df, '지역', ['매출합계', '이익합계', '거래수'])
     
     # 지도 데이터 생성
     map_data = []
@@ -124,20 +1591,1035 @@ def get_map_data(df):
 
 # 시간 단위별 데이터 집계 함수
 def aggregate_by_time(df, time_unit):
-    """시간 단위별로 데이터 집계"""
-    if time_unit == "일별":
-        df['time_group'] = df['날짜'].dt.date
-    elif time_unit == "주별":
-        df['time_group'] = df['날짜'].dt.to_period('W').dt.start_time
-    elif time_unit == "월별":
-        df['time_group'] = df['날짜'].dt.to_period('M').dt.start_time
-    else:
-        df['time_group'] = df['날짜'].dt.to_period('Q').dt.start_time
+    """시간 단위별로 데이터 집계 (입력 데이터프레임은 수정하지 않음)"""
+    return build_time_rollups(df, units=[time_unit])[time_unit]
+
+# 시간 롤업 피라미드
+TIME_UNITS = ["일별", "주별", "월별", "분기별"]
+
+def _rollup(time_group, measures):
+    """정렬된 time_group 경계마다 측정값을 np.add.reduceat 으로 합산"""
+    if len(time_group) == 0:
+        return pd.DataFrame({'time_group': time_group.astype('datetime64[ns]'), **{k: v[:0] for k, v in measures.items()}})
+    starts = np.flatnonzero(np.r_[True, time_group[1:] != time_group[:-1]])
+    rolled = {name: np.add.reduceat(values, starts) for name, values in measures.items()}
+    return pd.DataFrame({'time_group': time_group[starts].astype('datetime64[ns]'), **rolled})
+
+def _rollup_frame(frame, time_group):
+    return _rollup(time_group, {col: frame[col].values for col in ('매출', '이익', '거래수')})
+
+def build_time_rollups(df, units=None):
+    """일 → 주, 일 → 월 → 분기 순으로 아래 단계에서 위 단계를 만드는 롤업 피라미드
+
+    주는 월 경계를 넘나들므로 일 단위에서, 분기는 월 단위에서 만든다.
+    각 단계는 time_group(기간 시작일, datetime64), 매출, 이익, 거래수 컬럼을 가진 DataFrame 이다.
+    큐브나 원본 거래 데이터 모두 받을 수 있고 입력은 수정하지 않는다.
+    """
+    units = units or TIME_UNITS
+    counts = df['거래수'].values if '거래수' in df else np.ones(len(df), dtype=np.int64)
+    daily = pd.DataFrame({
+        'day': df['날짜'].values.astype('datetime64[D]'),
+        '매출': df['매출'].values,
+        '이익': df['이익'].values,
+        '거래수': counts
+    })
+    if not daily['day'].is_monotonic_increasing:
+        daily = daily.sort_values('day', kind='stable')
+    
+    day_level = _rollup_frame(daily, daily['day'].values)
+    day = day_level['time_group'].values.astype('datetime64[D]')
+    rollups = {'일별': day_level}
+    
+    if '주별' in units:
+        day_number = day.astype(np.int64)
+        # 1970-01-01 은 목요일이므로 (일 번호 + 3) % 7 이 월요일 기준 요일
+        week = (day_number - (day_number + 3) % 7).astype('datetime64[D]')
+        rollups['주별'] = _rollup_frame(day_level, week)
+    if '월별' in units or '분기별' in units:
+        month_level = _rollup_frame(day_level, day.astype('datetime64[M]'))
+        rollups['월별'] = month_level
+        month_number = month_level['time_group'].values.astype('datetime64[M]').astype(np.int64)
+        quarter = (month_number - month_number % 3).astype('datetime64[M]')
+        rollups['분기별'] = _rollup_frame(month_level, quarter)
+    
+    return rollups
+
+def get_time_series(snapshot, time_unit, filters=None):
+    """시간 단위별 집계 조회
+
+    필터가 없으면 스냅샷에 미리 계산된 롤업을 그대로 돌려주고(행 수와 무관),
+    필터가 있으면 큐브를 걸러 해당 단위만 계산해 공유 집계 캐시에 둔다. 반환된 DataFrame 은 수정하지 않는다.
+    """
+    if filters is None or not _filter_columns(filters):
+        return snapshot.rollups[time_unit]
+    return cached_aggregate(
+        snapshot, 'time_series', (time_unit, filters),
+        lambda: aggregate_by_time(filter_cube(snapshot.cube, filters), time_unit)
+    )
+
+# 이동 통계
+RollingStats = namedtuple('RollingStats', ['windows', 'columns', 'sma', 'std', 'ewma'])
+RollingStats.__doc__ = """기간 길이(창)별 이동평균/이동 표준편차/지수 이동평균
+
+sma/std/ewma 는 (창 수, 기간 수, 컬럼 수) 행렬이며 sma/std 는 창이 덜 찬 앞쪽 기간이 NaN 이다.
+"""
+
+def rolling_stats(frame, columns=('매출', '이익', '거래수'), windows=None):
+    """여러 창 길이의 이동평균, 이동 표준편차(표본), 지수 이동평균을 모든 컬럼에 대해 한 번에 계산
+
+    이동 합계와 제곱합은 누적합 하나에서 모든 창을 인덱싱해 구하고(값이 클 때 정밀도를 위해
+    컬럼 평균을 빼고 계산), 지수 이동평균(span=창 길이, pandas ewm(adjust=True) 과 같음)은
+    기간마다 한 번의 점화식으로 모든 창·컬럼을 함께 갱신한다.
+    """
+    windows = np.asarray(config.MOVING_AVERAGE_WINDOWS if windows is None else windows)
+    values = np.column_stack([frame[column].values.astype(np.float64) for column in columns])
+    n_periods = len(values)
+    
+    offset = values.mean(axis=0) if n_periods else np.zeros(len(columns))
+    centered = values - offset
+    csum = np.vstack([np.zeros((1, len(columns))), np.cumsum(centered, axis=0)])
+    csq = np.vstack([np.zeros((1, len(columns))), np.cumsum(centered ** 2, axis=0)])
+    
+    end = np.arange(1, n_periods + 1)
+    start = end - windows[:, None]
+    valid = start >= 0
+    start = np.maximum(start, 0)
+    w = windows[:, None, None].astype(np.float64)
+    sums = csum[end] - csum[start]
+    squares = csq[end] - csq[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sma = np.where(valid[..., None], sums / w + offset, np.nan)
+        # 누적합 차이의 반올림 오차(누적 제곱합 크기 × 기계 엡실론 수준) 이하는 0 으로 처리해
+        # 값이 일정한 창의 표준편차가 pandas 처럼 정확히 0 이 되도록 함
+        deviation = squares - sums ** 2 / w
+        tolerance = 64 * np.finfo(np.float64).eps * csq[end]
+        variance = np.where(deviation > tolerance, deviation, 0) / (w - 1)
+        std = np.where(valid[..., None], np.sqrt(variance), np.nan)
+    
+    decay = (1 - 2 / (windows + 1.0))[:, None]
+    ewma = np.empty((len(windows), n_periods, len(columns)))
+    numerator = np.zeros((len(windows), len(columns)))
+    denominator = np.zeros((len(windows), 1))
+    for t in range(n_periods):
+        numerator = values[t] + decay * numerator
+        denominator = 1 + decay * denominator
+        ewma[:, t] = numerator / denominator
+    
+    return RollingStats(list(windows), list(columns), _readonly(sma), _readonly(std), _readonly(ewma))
+
+def rolling_column(stats, kind, window, column):
+    """RollingStats 에서 한 창 길이·컬럼의 값 (kind: 'sma', 'std', 'ewma')"""
+    return getattr(stats, kind)[stats.windows.index(window), :, stats.columns.index(column)]
+
+def get_rolling_stats(snapshot, time_unit, filters=None):
+    """시간 단위별 집계의 이동 통계 (데이터 버전·시간 단위별로 한 번 계산해 공유 집계 캐시에 보관)"""
+    return cached_aggregate(
+        snapshot, 'rolling_stats', (time_unit, filters),
+        lambda: rolling_stats(get_time_series(snapshot, time_unit, filters))
+    )
+
+def period_start(dates, time_unit):
+    """날짜를 시간 단위 기간의 시작일로 변환 (build_time_rollups 의 time_group 과 같은 기준)"""
+    day = np.asarray(dates).astype('datetime64[D]')
+    if time_unit == '주별':
+        day_number = day.astype(np.int64)
+        day = (day_number - (day_number + 3) % 7).astype('datetime64[D]')
+    elif time_unit == '월별':
+        day = day.astype('datetime64[M]').astype('datetime64[D]')
+    elif time_unit == '분기별':
+        month_number = day.astype('datetime64[M]').astype(np.int64)
+        day = (month_number - month_number % 3).astype('datetime64[M]').astype('datetime64[D]')
+    return day.astype('datetime64[ns]')
+
+# 이상치 감지
+AnomalyScores = namedtuple('AnomalyScores', ['first_day', 'categories', 'regions', 'values', 'scores'])
+AnomalyScores.__doc__ = """(카테고리, 지역)별 일별 매출 행렬과 점수 행렬
+
+values/scores 는 (카테고리 수 × 지역 수, 일수) 행렬이며 행 번호는 카테고리 코드 × 지역 수 + 지역 코드,
+열 번호는 first_day(일 번호)로부터의 날짜 차이다. 점수를 매기지 않은 칸은 0 이다.
+"""
+
+def daily_series_matrix(cube, column='매출'):
+    """큐브를 (카테고리, 지역)별 일별 column 합계 행렬로 펼침 (거래가 없는 날은 0)"""
+    n_regions = len(cube['지역'].cat.categories)
+    n_series = len(cube['카테고리'].cat.categories) * n_regions
+    if cube.empty:
+        return np.zeros((n_series, 0)), 0
+    day = cube['날짜'].values.astype('datetime64[D]').astype(np.int64)
+    first_day = int(day.min())
+    series = cube['카테고리'].cat.codes.values.astype(np.int64) * n_regions + cube['지역'].cat.codes.values
+    values = np.zeros((n_series, int(day.max()) - first_day + 1))
+    values[series, day - first_day] = cube[column].values
+    return values, first_day
+
+def _series_mask(categories, regions, filters):
+    """(카테고리 코드 × 지역 수 + 지역 코드) 순서의 시계열 중 필터의 카테고리/지역에 해당하는 것"""
+    series = np.ones((len(categories), len(regions)), dtype=bool)
+    if filters is not None and filters.categories is not None:
+        series &= np.isin(categories, filters.categories)[:, None]
+    if filters is not None and filters.regions is not None:
+        series &= np.isin(regions, filters.regions)[None, :]
+    return series.reshape(-1)
+
+def rolling_zscores(values, window, min_periods, start=0):
+    """각 행의 직전 window 개 값(당일 제외) 평균/표준편차 기준 z-점수 (start 열부터)
+
+    누적합 두 번으로 모든 행·열의 이동 합계와 제곱합을 한꺼번에 구한다. 값이 클 때
+    제곱합의 정밀도 손실을 줄이기 위해 행마다 평균을 빼고 계산한다(z-점수는 변하지 않음).
+    """
+    base = max(start - window, 0)
+    block = values[:, base:]
+    if block.shape[1] == 0:
+        return np.zeros((len(values), 0))
+    centered = block - block.mean(axis=1, keepdims=True)
+    zeros = np.zeros((len(values), 1))
+    csum = np.hstack([zeros, np.cumsum(centered, axis=1)])
+    csq = np.hstack([zeros, np.cumsum(centered ** 2, axis=1)])
     
-    agg_data = df.groupby('time_group').agg(
-        매출=('매출', 'sum'),
-        이익=('이익', 'sum'),
-        거래수=('매출', 'count')
+    t = np.arange(start, values.shape[1])
+    lo = np.maximum(t - window, 0) - base
+    pos = t - base
+    count = pos - lo
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (csum[:, pos] - csum[:, lo]) / count
+        std = np.sqrt(np.maximum((csq[:, pos] - csq[:, lo]) / count - mean ** 2, 0))
+        scores = (centered[:, pos] - mean) / std
+    scores[:, count < min_periods] = 0
+    return np.where(np.isfinite(scores), scores, 0)
+
+def _mad_scores(windows, current):
+    """창(..., window)별 중앙값/MAD 기준 robust z-점수 (창에 NaN 이 있으면 무시)"""
+    reduce = np.nanmedian if np.isnan(windows).any() else np.median
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 창이 모두 NaN 인 앞부분
+        median = reduce(windows, axis=-1)
+        mad = reduce(np.abs(windows - median[..., None]), axis=-1)
+        scores = 0.6745 * (current - median) / mad
+    return np.where(np.isfinite(scores), scores, 0)
+
+def rolling_mad_scores(values, window, min_periods, start=0, chunk=None):
+    """각 행의 직전 window 개 값(당일 제외) 중앙값/MAD 기준 robust z-점수 (start 열부터)
+
+    sliding_window_view 로 모든 창을 한 번에 만들고, 메모리를 제한하기 위해 chunk 개 행씩 처리한다.
+    창이 덜 찬 앞쪽 window 개 열만 NaN 을 채워 nanmedian 으로 계산한다.
+    """
+    chunk = chunk or config.ANOMALY_MAD_CHUNK
+    base = max(start - window, 0)
+    n_cols = values.shape[1] - start
+    scores = np.zeros((len(values), max(n_cols, 0)))
+    if n_cols <= 0:
+        return scores
+    t = np.arange(start, values.shape[1])
+    count = np.minimum(t, window)
+    for row in range(0, len(values), chunk):
+        block = values[row:row + chunk, base:]
+        # 앞쪽을 NaN 으로 채워 t 열의 창이 항상 [t - window, t) 가 되게 함
+        padded = np.hstack([np.full((len(block), window), np.nan), block])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+        partial = t < window
+        if partial.any():
+            cols = t[partial] - base
+            scores[row:row + chunk, partial] = _mad_scores(windows[:, cols], block[:, cols])
+        cols = t[~partial] - base
+        scores[row:row + chunk, ~partial] = _mad_scores(windows[:, cols], block[:, cols])
+    scores[:, count < min_periods] = 0
+    return scores
+
+ANOMALY_METHODS = {
+    'zscore': rolling_zscores,
+    'mad': rolling_mad_scores
+}
+
+class AnomalyDetector:
+    """(카테고리, 지역)별 일별 매출 시계열 전체를 한 번의 행렬 연산으로 점수화하는 이상치 감지기
+
+    update() 는 직전 결과의 매출 행렬과 비교해 값이 바뀐 첫 날짜부터만 점수를 다시 계산하므로,
+    새 날짜가 추가될 때의 비용은 (시계열 수 × (새 일수 + window)) 에 비례한다.
+    카테고리/지역이 새로 생기거나 시작일이 바뀌면 전체를 다시 계산한다.
+    """
+    
+    def __init__(self, method=None, window=None, min_periods=None):
+        self.method = method or config.ANOMALY_METHOD
+        self.window = window or config.ANOMALY_WINDOW
+        self.min_periods = min_periods or config.ANOMALY_MIN_PERIODS
+        self.last_recomputed_days = 0
+        self._last = None
+        self._last_version = -1
+        self._lock = threading.Lock()
+    
+    def score(self, values, start=0):
+        return ANOMALY_METHODS[self.method](values, self.window, self.min_periods, start)
+    
+    def update(self, cube, version=0):
+        values, first_day = daily_series_matrix(cube)
+        with self._lock:
+            last = self._last
+            start = 0
+            if (last is not None and last.first_day == first_day and len(last.values) == len(values)
+                    and last.values.shape[1] <= values.shape[1]):
+                old_days = last.values.shape[1]
+                changed = np.flatnonzero((values[:, :old_days] != last.values).any(axis=0))
+                start = int(changed[0]) if len(changed) else old_days
+            
+            scores = np.empty_like(values)
+            scores[:, :start] = last.scores[:, :start] if start else 0
+            scores[:, start:] = self.score(values, start)
+            result = AnomalyScores(
+                first_day,
+                list(cube['카테고리'].cat.categories),
+                list(cube['지역'].cat.categories),
+                _readonly(values),
+                _readonly(scores)
+            )
+            # 이전 버전 스냅샷을 늦게 계산한 경우에는 최신 상태를 덮어쓰지 않음
+            if version >= self._last_version:
+                self._last, self._last_version = result, version
+            self.last_recomputed_days = values.shape[1] - start
+            return result
+
+def find_anomalies(anomaly_scores, threshold, filters=None):
+    """|점수| 가 threshold 이상인 (날짜, 카테고리, 지역) 목록 (필터의 카테고리/지역/기간만)"""
+    categories, regions = anomaly_scores.categories, anomaly_scores.regions
+    mask = np.abs(anomaly_scores.scores) >= threshold
+    if filters is not None:
+        series = _series_mask(categories, regions, filters)
+        days = anomaly_scores.first_day + np.arange(mask.shape[1])
+        in_range = np.ones(mask.shape[1], dtype=bool)
+        if filters.start_date is not None:
+            in_range &= days >= _day_number(filters.start_date)
+        if filters.end_date is not None:
+            in_range &= days <= _day_number(filters.end_date)
+        mask &= series[:, None] & in_range
+    
+    series_index, day_index = np.nonzero(mask)
+    category_codes, region_codes = np.divmod(series_index, len(regions))
+    return pd.DataFrame({
+        '날짜': (day_index + anomaly_scores.first_day).astype('datetime64[D]').astype('datetime64[ns]'),
+        '카테고리': np.asarray(categories, dtype=object)[category_codes],
+        '지역': np.asarray(regions, dtype=object)[region_codes],
+        '매출': anomaly_scores.values[series_index, day_index],
+        '점수': anomaly_scores.scores[series_index, day_index]
+    })
+
+def get_anomaly_threshold():
+    """현재 세션의 이상치 감지 임계값 (설정 > 알림 설정에서 저장, 없으면 기본값)"""
+    return st.session_state.get('anomaly_threshold', config.ANOMALY_THRESHOLD)
+
+def anomaly_trace(time_data, anomalies, time_unit, metric='매출', max_labels=5):
+    """이상치가 있는 기간을 metric 선 위에 표시하는 마커 trace (이상치가 없으면 None)"""
+    if anomalies.empty:
+        return None
+    labels = (anomalies['카테고리'] + '/' + anomalies['지역'] + ' ' + anomalies['날짜'].dt.strftime('%m-%d')
+              + ' (' + anomalies['점수'].map('{:+.1f}σ'.format) + ')')
+    flagged = pd.DataFrame({
+        'time_group': period_start(anomalies['날짜'].values, time_unit),
+        'label': labels,
+        'strength': anomalies['점수'].abs()
+    }).sort_values('strength', ascending=False).groupby('time_group').agg(
+        label=('label', lambda values: '<br>'.join(values[:max_labels])
+               + (f'<br>외 {len(values) - max_labels}건' if len(values) > max_labels else '')),
+        count=('label', 'size')
     ).reset_index()
+    points = time_data[['time_group', metric]].merge(flagged, on='time_group')
+    if points.empty:
+        return None
+    return go.Scatter(
+        x=points['time_group'],
+        y=points[metric],
+        mode='markers',
+        name='이상치',
+        marker=dict(color='#E53935', size=12, symbol='circle-open', line=dict(width=2)),
+        text=points['label'],
+        hovertemplate='%{x|%Y-%m-%d}<br>%{text}<extra>이상치</extra>'
+    )
+
+# 시계열 예측
+SeriesForecast = namedtuple('SeriesForecast', ['first_day', 'categories', 'regions', 'values', 'mean', 'variance'])
+SeriesForecast.__doc__ = """(카테고리, 지역)별 일별 관측 행렬과 마지막 관측일 다음 날부터의 예측 평균/분산 행렬
+
+values 는 (시계열 수, 관측 일수), mean/variance 는 (시계열 수, 예측 일수) 행렬이며
+행 순서는 AnomalyScores 와 같다.
+"""
+
+HoltWintersState = namedtuple('HoltWintersState', ['level', 'trend', 'season', 'errors'])
+HoltWintersState.__doc__ = """각 열(날짜)을 관측한 뒤의 수준/추세/계절 성분과 1일 앞 예측 오차 (모두 시계열 수 × 일수)"""
+
+def holt_winters(values, alpha, beta, gamma, period, start=0, state=None):
+    """모든 행(시계열)에 가법 Holt-Winters 를 동시에 적합
+
+    시간 방향 점화식은 날짜마다 한 번씩 돌지만 각 단계는 전체 시계열에 대한 벡터 연산이다.
+    state 에 이전 결과가 있으면 start 열 이전 상태를 그대로 두고 start 열부터만 다시 계산한다.
+    첫 주기는 초기화 구간으로 (주기 평균 수준, 추세 0, 평균과의 차이를 계절 성분)으로 채운다.
+    """
+    n_series, n_days = values.shape
+    start = start if state is not None and start >= period else 0
+    level, trend, season, errors = (np.zeros((n_series, n_days)) for _ in range(4))
+    if start:
+        for new, old in zip((level, trend, season, errors), state):
+            new[:, :start] = old[:, :start]
+    else:
+        init = values[:, :period].mean(axis=1, keepdims=True)
+        level[:, :period] = init
+        season[:, :period] = values[:, :period] - init
+        start = min(period, n_days)
     
-    return agg_data
\ No newline at end of file
+    for t in range(start, n_days):
+        previous = level[:, t - 1] + trend[:, t - 1]
+        seasonal = season[:, t - period]
+        errors[:, t] = values[:, t] - (previous + seasonal)
+        level[:, t] = alpha * (values[:, t] - seasonal) + (1 - alpha) * previous
+        trend[:, t] = beta * (level[:, t] - level[:, t - 1]) + (1 - beta) * trend[:, t - 1]
+        season[:, t] = gamma * (values[:, t] - level[:, t]) + (1 - gamma) * seasonal
+    return HoltWintersState(level, trend, season, errors)
+
+def holt_winters_forecast(state, alpha, beta, gamma, period, horizon, error_window):
+    """마지막 상태에서 horizon 일 앞까지의 예측 평균과 분산 (시계열 수 × horizon)
+
+    분산은 최근 error_window 일의 1일 앞 예측 오차 제곱 평균 σ² 에 가법 Holt-Winters 의
+    h 일 앞 분산 배수 1 + Σ_{j<h} (α(1 + jβ) + γ·[j 가 주기의 배수])² 를 곱한 값이다.
+    """
+    n_days = state.level.shape[1]
+    steps = np.arange(1, horizon + 1)
+    season_index = n_days - period + (steps - 1) % period
+    mean = state.level[:, -1:] + state.trend[:, -1:] * steps + state.season[:, season_index]
+    
+    recent = state.errors[:, max(period, n_days - error_window):]
+    sigma2 = (recent ** 2).mean(axis=1, keepdims=True) if recent.shape[1] else np.zeros((len(mean), 1))
+    j = steps[:-1]
+    c = alpha * (1 + j * beta) + gamma * (j % period == 0)
+    variance = sigma2 * np.r_[1.0, 1 + np.cumsum(c ** 2)]
+    return mean, variance
+
+class Forecaster:
+    """(카테고리, 지역)별 일별 시계열 전체를 한 번에 적합하는 가법 Holt-Winters 예측기
+
+    update() 는 적합 상태(날짜별 수준/추세/계절)를 보관해 두었다가 직전 관측 행렬과 비교해
+    값이 바뀐 첫 날짜부터만 점화식을 이어서 계산하므로, 새 날짜가 추가될 때의 비용은 새 일수에 비례한다.
+    카테고리/지역이 새로 생기거나 시작일이 바뀌면 처음부터 다시 적합한다.
+    """
+    
+    def __init__(self, column='매출', alpha=None, beta=None, gamma=None, period=None, horizon=None):
+        self.column = column
+        self.alpha = config.FORECAST_ALPHA if alpha is None else alpha
+        self.beta = config.FORECAST_BETA if beta is None else beta
+        self.gamma = config.FORECAST_GAMMA if gamma is None else gamma
+        self.period = period or config.FORECAST_SEASON_DAYS
+        self.horizon = horizon or config.FORECAST_MAX_HORIZON
+        self.last_refit_days = 0
+        self._last = None  # (관측 행렬, 시작일, 적합 상태)
+        self._last_version = -1
+        self._lock = threading.Lock()
+    
+    def update(self, cube, version=0):
+        values, first_day = daily_series_matrix(cube, self.column)
+        with self._lock:
+            start, state = 0, None
+            if self._last is not None:
+                last_values, last_first_day, state = self._last
+                if (last_first_day == first_day and len(last_values) == len(values)
+                        and last_values.shape[1] <= values.shape[1]):
+                    old_days = last_values.shape[1]
+                    changed = np.flatnonzero((values[:, :old_days] != last_values).any(axis=0))
+                    start = int(changed[0]) if len(changed) else old_days
+            
+            state = holt_winters(values, self.alpha, self.beta, self.gamma, self.period, start, state)
+            if values.shape[1] >= self.period:
+                mean, variance = holt_winters_forecast(
+                    state, self.alpha, self.beta, self.gamma, self.period, self.horizon, config.FORECAST_ERROR_WINDOW
+                )
+            else:
+                # 한 주기도 관측하지 못했으면 예측하지 않음
+                mean = variance = np.zeros((len(values), 0))
+            result = SeriesForecast(
+                first_day,
+                list(cube['카테고리'].cat.categories),
+                list(cube['지역'].cat.categories),
+                _readonly(values),
+                _readonly(mean),
+                _readonly(variance)
+            )
+            # 이전 버전 스냅샷을 늦게 계산한 경우에는 최신 상태를 덮어쓰지 않음
+            if version >= self._last_version:
+                self._last, self._last_version = (values, first_day, state), version
+            self.last_refit_days = values.shape[1] - (start if start >= self.period else 0)
+            return result
+
+def forecast_by_period(forecast, time_unit, horizon, filters=None):
+    """필터의 카테고리/지역 시계열 예측을 합쳐 시간 단위별 예측값과 예측 구간으로 집계
+
+    반환 DataFrame 은 time_group, 예측, 하한, 상한 컬럼을 가진다. 분산은 시계열·날짜 간 오차가
+    독립이라고 보고 더한다. 마지막 관측 기간이 끝나지 않았으면 그 기간은 관측분 + 남은 날의 예측으로 채운다.
+    관측값이 모두 0 이상인 지표는 하한을 0 으로 자른다.
+    """
+    rows = _series_mask(forecast.categories, forecast.regions, filters)
+    horizon = min(horizon, forecast.mean.shape[1])
+    n_days = forecast.values.shape[1]
+    if horizon == 0 or not rows.any():
+        return pd.DataFrame({'time_group': pd.Series(dtype='datetime64[ns]'), '예측': [], '하한': [], '상한': []})
+    
+    observed = forecast.values[rows].sum(axis=0)
+    mean = forecast.mean[rows, :horizon].sum(axis=0)
+    variance = forecast.variance[rows, :horizon].sum(axis=0)
+    
+    days = (forecast.first_day + n_days + np.arange(horizon)).astype('datetime64[D]')
+    groups = period_start(days, time_unit)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    period_mean = np.add.reduceat(mean, starts)
+    period_sd = np.sqrt(np.add.reduceat(variance, starts))
+    
+    # 마지막 관측일이 속한 기간에 이미 관측한 값
+    last_days = (forecast.first_day + np.arange(n_days)).astype('datetime64[D]')
+    in_first = period_start(last_days, time_unit) == groups[0]
+    period_mean[0] += observed[in_first].sum()
+    
+    lower = period_mean - config.FORECAST_INTERVAL_Z * period_sd
+    if (forecast.values >= 0).all():
+        lower = np.maximum(lower, 0)
+    return pd.DataFrame({
+        'time_group': groups[starts].astype('datetime64[ns]'),
+        '예측': period_mean,
+        '하한': lower,
+        '상한': period_mean + config.FORECAST_INTERVAL_Z * period_sd
+    })
+
+def get_forecast(store, snapshot, metric, time_unit, horizon, filters=None):
+    """시간 단위별 예측 조회 (적합은 버전별로 한 번, 기간 집계는 공유 집계 캐시 사용)"""
+    return cached_aggregate(
+        snapshot, 'forecast', (metric, time_unit, horizon, filters),
+        lambda: forecast_by_period(store.forecast(snapshot, metric), time_unit, horizon, filters)
+    )
+
+def forecast_traces(forecast, metric, color='#FB8C00'):
+    """예측 구간(채운 영역)과 예측값(점선) trace 목록"""
+    fill = 'rgba(251, 140, 0, 0.15)'
+    return [
+        go.Scatter(x=forecast['time_group'], y=forecast['상한'], mode='lines', line=dict(width=0),
+                   showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=forecast['time_group'], y=forecast['하한'], mode='lines', line=dict(width=0),
+                   fill='tonexty', fillcolor=fill, name=f"{metric} 예측 구간", hoverinfo='skip'),
+        go.Scatter(x=forecast['time_group'], y=forecast['예측'], mode='lines+markers',
+                   line=dict(color=color, dash='dot'), name=f"{metric} 예측")
+    ]
+
+# 세션 관리
+class _SessionEntry:
+    __slots__ = ('username', 'login_time', 'last_seen', 'page')
+    
+    def __init__(self, username, now):
+        self.username = username
+        self.login_time = datetime.now()
+        self.last_seen = now
+        self.page = None
+
+class SessionRegistry:
+    """프로세스 전체의 로그인 세션 목록 (세션 id -> 사용자, 마지막 활동 시각)
+
+    로그인은 max_sessions 개까지만 받는다. 탭을 닫거나 새로 고쳐 Streamlit 런타임에서 더 이상
+    활성 상태가 아닌 세션은 바로 목록에서 빼고, timeout 초 동안 재실행이 없는 세션은 런타임에서
+    닫아(close_session) 세션 상태를 해제한다. 세션 상태를 직접 수정하지는 않으며, 런타임이 없을 때
+    (AppTest 등)는 만료된 세션이 다음 재실행 때 스스로 상태를 비운다 (track_session).
+    """
+    
+    def __init__(self, max_sessions, timeout):
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self.expired_total = 0
+        self.rejected_total = 0
+        self._sessions = {}
+        self._lock = threading.Lock()
+    
+    def _prune(self, now):
+        """닫힌 세션을 빼고 유휴 시간이 timeout 을 넘은 세션을 닫음 (self._lock 을 잡은 상태에서 호출)"""
+        cutoff = now - self.timeout
+        runtime = Runtime.instance() if Runtime.exists() else None
+        for session_id, entry in list(self._sessions.items()):
+            if runtime is not None and not runtime.is_active_session(session_id):
+                del self._sessions[session_id]
+            elif entry.last_seen < cutoff:
+                del self._sessions[session_id]
+                self.expired_total += 1
+                _close_runtime_session(runtime, session_id)
+    
+    def admit(self, session_id, username):
+        """로그인 요청: 자리가 있으면 등록하고 True, 최대 세션 수에 도달했으면 False"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if session_id not in self._sessions and len(self._sessions) >= self.max_sessions:
+                self.rejected_total += 1
+                return False
+            self._sessions[session_id] = _SessionEntry(username, now)
+            return True
+    
+    def touch(self, session_id, username, page):
+        """로그인된 세션의 재실행마다 호출: 활동 시각을 갱신하고 만료된 세션을 정리"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                # 재시작 등으로 목록에 없는 로그인 세션은 제한과 상관없이 다시 등록
+                entry = self._sessions[session_id] = _SessionEntry(username, now)
+            entry.last_seen = now
+            entry.page = page
+            self._prune(now)
+    
+    def expire(self, session_id):
+        """세션이 스스로 만료를 확인했을 때 호출 (아직 목록에 있으면 만료 수에 포함)"""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is not None:
+                self.expired_total += 1
+    
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def active(self, within):
+        """within 초 안에 재실행한 로그인 세션 수"""
+        cutoff = time.monotonic() - within
+        with self._lock:
+            return sum(entry.last_seen >= cutoff for entry in self._sessions.values())
+    
+    def sessions(self):
+        """관리 화면용 세션 목록 (마지막 활동이 최근인 순)"""
+        now = time.monotonic()
+        with self._lock:
+            entries = sorted(self._sessions.values(), key=lambda entry: entry.last_seen, reverse=True)
+            return [{
+                'username': entry.username,
+                'login_time': entry.login_time,
+                'idle_seconds': now - entry.last_seen,
+                'page': entry.page
+            } for entry in entries]
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+def _close_runtime_session(runtime, session_id):
+    """만료된 세션을 런타임에서 닫아 세션 상태와 미디어 파일을 해제
+
+    브라우저 연결도 끊어, 탭이 열려 있으면 새 세션으로 다시 연결해 로그인 화면을 보여 준다.
+    """
+    if runtime is None:
+        return
+    
+    def close():
+        client = runtime.get_client(session_id)
+        runtime.close_session(session_id)
+        if client is not None and hasattr(client, 'close'):
+            client.close()
+    
+    # close_session 은 런타임 이벤트 루프 스레드에서만 호출할 수 있다 (Runtime.stop 과 같은 방식)
+    runtime._get_async_objs().eventloop.call_soon_threadsafe(close)
+
+SESSIONS = SessionRegistry(config.MAX_CONCURRENT_SESSIONS, config.SESSION_TIMEOUT_MINUTES * 60)
+
+def login_session(username):
+    """로그인 직전에 호출: 동시 접속 세션 수 제한 안이면 세션을 등록하고 True"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return True
+    if not SESSIONS.admit(ctx.session_id, username):
+        return False
+    st.session_state['_last_activity'] = time.monotonic()
+    return True
+
+def logout_session():
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        SESSIONS.remove(ctx.session_id)
+
+def track_session(page):
+    """로그인된 세션의 재실행 시작 시 호출: 유휴 시간이 만료 시간을 넘었으면 이 세션의 상태를 비움
+
+    세션 상태 정리는 항상 그 세션의 스크립트 스레드에서 st.session_state 로만 한다.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not st.session_state.get('authenticated', False):
+        return
+    now = time.monotonic()
+    last_activity = st.session_state.get('_last_activity')
+    if last_activity is not None and now - last_activity > SESSIONS.timeout:
+        SESSIONS.expire(ctx.session_id)
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.session_state['session_expired'] = True
+        return
+    st.session_state['_last_activity'] = now
+    SESSIONS.touch(ctx.session_id, st.session_state.get('username', ''), page)
+
+# 모니터링 지표 (Prometheus 텍스트 형식)
+class PageMetrics:
+    """페이지 재실행 시간 히스토그램 (프로세스 전체 공유)"""
+    
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self._histograms = {}  # 페이지 -> {'counts': 버킷별 개수(마지막은 +Inf), 'sum': 합계}
+        self._lock = threading.Lock()
+    
+    def observe(self, page, seconds):
+        with self._lock:
+            histogram = self._histograms.get(page)
+            if histogram is None:
+                histogram = self._histograms[page] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            histogram['counts'][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram['sum'] += seconds
+    
+    def histograms(self):
+        with self._lock:
+            return {page: {'counts': list(h['counts']), 'sum': h['sum']} for page, h in self._histograms.items()}
+
+PAGE_METRICS = PageMetrics(config.METRICS_LATENCY_BUCKETS)
+
+def begin_page_rerun(page):
+    """페이지 스크립트 시작 시 호출: 재실행 시간 측정을 시작하고 로그인 세션의 활동을 기록"""
+    ensure_metrics_exporter()
+    API.ensure()
+    track_session(page)
+    st.session_state['_rerun_started'] = (page, time.perf_counter())
+
+def end_page_rerun():
+    """페이지 스크립트 끝(또는 st.stop 직전)에서 호출: 재실행 시간 기록
+
+    중간에 st.rerun 등으로 끊긴 실행은 기록하지 않는다.
+    """
+    started = st.session_state.pop('_rerun_started', None)
+    if started is not None:
+        PAGE_METRICS.observe(started[0], time.perf_counter() - started[1])
+
+def _process_rss_bytes():
+    """현재 프로세스 상주 메모리 (리눅스 /proc 기준, 읽을 수 없으면 None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+def render_metrics():
+    """utils 와 페이지에서 모은 지표를 Prometheus 텍스트 형식으로 출력"""
+    lines = []
+    
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+    
+    samples = []
+    for page, histogram in sorted(PAGE_METRICS.histograms().items()):
+        cumulative = 0
+        for bound, count in zip(PAGE_METRICS.buckets + ['+Inf'], histogram['counts']):
+            cumulative += count
+            samples.append(('_bucket', {'page': page, 'le': bound}, cumulative))
+        samples.append(('_sum', {'page': page}, float(histogram['sum'])))
+        samples.append(('_count', {'page': page}, cumulative))
+    metric('dashboard_page_rerun_seconds', 'histogram', "페이지 스크립트 재실행 시간 (초)", samples)
+    
+    caches = {'aggregate': AGGREGATE_CACHE, 'figure': FIGURE_CACHE}
+    metric('dashboard_cache_hits_total', 'counter', "캐시 히트 수",
+           [('', {'cache': name}, cache.hits) for name, cache in caches.items()])
+    metric('dashboard_cache_misses_total', 'counter', "캐시 미스 수",
+           [('', {'cache': name}, cache.misses) for name, cache in caches.items()])
+    metric('dashboard_cache_entries', 'gauge', "캐시 항목 수",
+           [('', {'cache': name}, len(cache)) for name, cache in caches.items()])
+    metric('dashboard_cache_bytes', 'gauge', "캐시 사용 메모리 (바이트)",
+           [('', {'cache': name}, cache.size_bytes) for name, cache in caches.items()])
+    
+    snapshots = [store.snapshot for store in served_stores()]
+    metric('dashboard_dataset_rows', 'gauge', "공유 데이터셋 행 수",
+           [('', {}, sum(len(snap.dataset) for snap in snapshots))])
+    metric('dashboard_dataset_bytes', 'gauge', "공유 데이터셋 메모리 (바이트)",
+           [('', {}, sum(snap.dataset.memory_usage() for snap in snapshots))])
+    metric('dashboard_data_version', 'gauge', "데이터 버전 (추가·갱신마다 증가)",
+           [('', {}, max((snap.version for snap in snapshots), default=0))])
+    metric('dashboard_active_sessions', 'gauge', f"최근 {config.ACTIVE_SESSION_SECONDS}초 안에 재실행한 로그인 세션 수",
+           [('', {}, SESSIONS.active(config.ACTIVE_SESSION_SECONDS))])
+    metric('dashboard_sessions', 'gauge', "등록된 로그인 세션 수", [('', {}, len(SESSIONS))])
+    metric('dashboard_sessions_expired_total', 'counter', "유휴 시간 초과로 만료된 세션 수",
+           [('', {}, SESSIONS.expired_total)])
+    metric('dashboard_logins_rejected_total', 'counter', "동시 접속 세션 수 제한으로 거부된 로그인 수",
+           [('', {}, SESSIONS.rejected_total)])
+    
+    rss = _process_rss_bytes()
+    if rss is not None:
+        metric('process_resident_memory_bytes', 'gauge', "프로세스 상주 메모리 (바이트)", [('', {}, rss)])
+    
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # 수집기 요청마다 접근 로그를 남기지 않음
+        pass
+
+def _start_http_exporter(host, port):
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http-exporter', daemon=True).start()
+    return server
+
+def write_metrics_file(path):
+    """지표를 임시 파일에 쓴 뒤 교체 (수집기가 쓰다 만 파일을 읽지 않도록)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+def _start_file_exporter(path, interval):
+    stop = threading.Event()
+    
+    def loop():
+        while True:
+            try:
+                write_metrics_file(path)
+            except OSError as e:
+                # 디스크 가득 참, 권한 문제 등은 기록만 하고 다음 주기에 다시 시도
+                logging.getLogger(__name__).warning("지표 파일을 쓰지 못했습니다 (%s): %s", path, e)
+            if stop.wait(interval):
+                return
+    
+    threading.Thread(target=loop, name='metrics-file-exporter', daemon=True).start()
+    return stop
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def ensure_metrics_exporter():
+    """config.METRICS_EXPORTER 가 설정되어 있으면 지표 내보내기를 프로세스에서 한 번만 시작
+
+    'http' 는 METRICS_HTTP_HOST:METRICS_HTTP_PORT 의 /metrics 로 제공하고,
+    'file' 은 METRICS_FILE_PATH 에 METRICS_FILE_INTERVAL 초마다 기록한다 (node_exporter textfile 수집용).
+    """
+    global _exporter
+    if _exporter is not None or not config.METRICS_EXPORTER:
+        return _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            if config.METRICS_EXPORTER == 'http':
+                try:
+                    _exporter = _start_http_exporter(config.METRICS_HTTP_HOST, config.METRICS_HTTP_PORT)
+                except OSError as e:
+                    # 포트를 이미 쓰고 있으면 (예: 코드 변경으로 모듈이 다시 로드됨) 다시 시도하지 않음
+                    logging.getLogger(__name__).warning("지표 HTTP 서버를 시작하지 못했습니다: %s", e)
+                    _exporter = e
+            elif config.METRICS_EXPORTER == 'file':
+                _exporter = _start_file_exporter(config.METRICS_FILE_PATH, config.METRICS_FILE_INTERVAL)
+            else:
+                raise ValueError(f"지원하지 않는 지표 내보내기 방식입니다: {config.METRICS_EXPORTER}")
+    return _exporter
+
+# 읽기 전용 집계 API
+class RateLimiter:
+    """API 키별 토큰 버킷 (분당 rate 개씩 보충, 최대 rate 개까지 연속 요청 허용)"""
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self._buckets = {}  # 키 -> (남은 토큰, 마지막 보충 시각)
+        self._lock = threading.Lock()
+    
+    def acquire(self, key):
+        """토큰 하나를 쓰고 0 을, 토큰이 없으면 다음 토큰까지 기다릴 초를 반환"""
+        now = time.monotonic()
+        per_second = self.rate / 60
+        with self._lock:
+            tokens, refilled = self._buckets.get(key, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - refilled) * per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / per_second
+    
+    def remaining(self, key):
+        with self._lock:
+            tokens, refilled = self._buckets.get(key, (self.rate, time.monotonic()))
+        return int(min(self.rate, tokens + (time.monotonic() - refilled) * self.rate / 60))
+
+# API 경로 레지스트리 (이름 -> (스냅샷, 쿼리 파라미터)로 DataFrame 을 돌려주는 함수)
+API_ROUTES = {}
+API_KPI_METRICS = ['매출합계', '이익합계', '거래수', '이익률']
+
+def api_route(name):
+    """/api/<name> 경로 등록 데코레이터"""
+    def register(func):
+        API_ROUTES[name] = func
+        return func
+    return register
+
+def _api_param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+def _api_list(params, name):
+    """콤마 구분 목록 파라미터 (여러 번 지정해도 됨)"""
+    return [item for value in params.get(name, []) for item in value.split(',') if item]
+
+def _api_filters(params):
+    return make_filter(
+        _api_list(params, 'categories'), _api_list(params, 'regions'),
+        _api_param(params, 'start'), _api_param(params, 'end')
+    )
+
+def _api_metrics(params, default):
+    metrics = _api_list(params, 'metrics') or default
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"알 수 없는 지표입니다: {', '.join(unknown)}")
+    return metrics
+
+@api_route('kpi')
+def _api_kpi(snapshot, params):
+    return get_metrics(snapshot, None, _api_metrics(params, API_KPI_METRICS), _api_filters(params))
+
+@api_route('breakdown')
+def _api_breakdown(snapshot, params):
+    by = _api_param(params, 'by', '카테고리')
+    if by not in ('카테고리', '지역'):
+        raise ValueError("by 는 카테고리 또는 지역이어야 합니다")
+    return get_metrics(snapshot, by, _api_metrics(params, API_KPI_METRICS), _api_filters(params))
+
+@api_route('time_series')
+def _api_time_series(snapshot, params):
+    time_unit = _api_param(params, 'unit', '월별')
+    if time_unit not in TIME_UNITS:
+        raise ValueError(f"unit 은 {', '.join(TIME_UNITS)} 중 하나여야 합니다")
+    return get_time_series(snapshot, time_unit, _api_filters(params))
+
+def serialize_frame(frame, fmt):
+    """API 응답 본문과 Content-Type (json: 행 목록, arrow: Arrow IPC 스트림)"""
+    if fmt == 'json':
+        body = frame.to_json(orient='records', date_format='iso', force_ascii=False)
+        return body.encode('utf-8'), 'application/json; charset=utf-8'
+    if fmt == 'arrow':
+        import pyarrow as pa
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), 'application/vnd.apache.arrow.stream'
+    raise ValueError("format 은 json 또는 arrow 여야 합니다")
+
+class _ApiHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        api = self.server.api
+        url = urllib.parse.urlsplit(self.path)
+        route = API_ROUTES.get(url.path.removeprefix('/api/'))
+        if not url.path.startswith('/api/') or route is None:
+            self._send_error(404, f"지원하는 경로: {', '.join('/api/' + name for name in API_ROUTES)}")
+            return
+        
+        key = self.headers.get('X-API-Key', '')
+        if key not in api.keys:
+            self._send_error(401, "X-API-Key 헤더에 유효한 API 키가 필요합니다")
+            return
+        wait = api.limiter.acquire(key)
+        if wait:
+            self._send_error(429, f"분당 요청 제한({api.limiter.rate}회)을 넘었습니다", {'Retry-After': str(int(np.ceil(wait)))})
+            return
+        
+        store = api.store
+        if store is None:
+            self._send_error(503, "데이터가 아직 로드되지 않았습니다")
+            return
+        snapshot = store.snapshot
+        params = urllib.parse.parse_qs(url.query)
+        try:
+            frame = route(snapshot, params)
+            body, content_type = serialize_frame(frame, _api_param(params, 'format', 'json'))
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        except Exception as e:
+            logging.getLogger(__name__).exception("집계 API 요청 처리에 실패했습니다: %s", self.path)
+            self._send_error(500, f"요청을 처리하지 못했습니다: {type(e).__name__}")
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Data-Version', str(snapshot.version))
+        self.send_header('X-RateLimit-Remaining', str(api.limiter.remaining(key)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_error(self, status, message, headers=None):
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class AggregateApi:
+    """utils 집계(KPI, 카테고리/지역별, 시계열)를 JSON 또는 Arrow 로 제공하는 로컬 HTTP API
+
+    집계는 get_metrics / get_time_series 를 그대로 거치므로 UI 와 같은 공유 집계 캐시를 쓰고,
+    요청마다 페이지를 재실행하는 비용 없이 캐시된 결과를 직렬화만 해서 돌려준다.
+    데이터는 get_data_store() 가 기본 소스로 만든 저장소(store)의 현재 스냅샷을 읽는다.
+    """
+    
+    def __init__(self, host, port, rate, keys, enabled=False):
+        self.host = host
+        self.port = port
+        self.keys = keys
+        self.limiter = RateLimiter(rate)
+        self.enabled = enabled
+        self.store = None
+        self.server = None
+        self.error = None
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self):
+        return self.server is not None
+    
+    def ensure(self):
+        """켜져 있으면 서버를 프로세스에서 한 번만 시작 (포트를 열지 못했으면 다시 시도하지 않음)"""
+        if not self.enabled or self.server is not None or self.error is not None:
+            return
+        with self._lock:
+            if self.server is None and self.error is None:
+                try:
+                    server = http.server.ThreadingHTTPServer((self.host, self.port), _ApiHandler)
+                except OSError as e:
+                    logging.getLogger(__name__).warning("집계 API 서버를 시작하지 못했습니다: %s", e)
+                    self.error = e
+                    return
+                server.api = self
+                threading.Thread(target=server.serve_forever, name='aggregate-api', daemon=True).start()
+                self.server = server
+    
+    def set_enabled(self, enabled):
+        """고급 설정에서 API 를 켜거나 끔"""
+        self.enabled = enabled
+        if enabled:
+            self.error = None
+            self.ensure()
+            return
+        with self._lock:
+            if self.server is not None:
+                self.server.shutdown()
+                self.server.server_close()
+                self.server = None
+
+API = AggregateApi(config.API_HOST, config.API_PORT, config.API_RATE_LIMIT, config.API_KEYS, config.API_ENABLED)